@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+API JSON read-only untuk agregat dashboard APBA 2025
+(memakai load_version/load_search dari dashboard_apba_2025.py)
+
+    python apba_api.py [--host 127.0.0.1] [--port 8502]
+
+    GET /api/ringkasan                 KPI + komposisi, top SKPD, urusan
+    GET /api/skpd                      total belanja per SKPD
+    GET /api/skpd/<nama>               rincian kategori belanja satu SKPD
+    GET /api/otsus                     alokasi otsus per sektor
+    GET /api/hibah?jenis=&limit=&offset=
+    GET /api/bantuan
+    GET /api/search?q=&limit=&offset=
+
+Respons di-cache (LRU), ber-ETag kuat sesuai versi data, dan di-gzip bila
+klien mendukung. Backend SQLite: tambahkan ?tahun= (hibah/bantuan → 404).
+"""
+
+import argparse, gzip, hashlib, json, math, os, threading, traceback
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import dashboard_apba_2025 as d
+
+CACHE_N = int(os.environ.get("APBA_API_CACHE", 256))
+MAX_AGE = 300
+LIMIT = 100
+
+
+class NotFound(Exception):
+    pass
+
+
+def records(df):
+    return [{k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in r.items()}
+            for r in df.to_dict("records")]
+
+def need(cube, key):
+    if key not in cube:
+        raise NotFound(f"Data {key} tidak tersedia pada backend {cube['backend']}.")
+    return cube[key]
+
+def page(q):
+    try:
+        lim, off = int(q.get("limit", LIMIT)), int(q.get("offset", 0))
+    except ValueError:
+        raise ValueError("Parameter limit/offset harus bilangan bulat.") from None
+    return max(1, min(lim, 1000)), max(off, 0)
+
+
+# ════════════════════════════════════════════
+# ENDPOINT
+# ════════════════════════════════════════════
+
+# Tiap endpoint menerima versi data `v` (lihat version_for) dan query string.
+
+def ep_ringkasan(v, q):
+    cube = v["cube"]
+    return {"kpi": d.agg_kpi(cube),
+            "komposisi": records(d.agg_komposisi(cube)),
+            "top_skpd": records(d.agg_top_skpd(cube).iloc[::-1]),
+            "urusan": records(d.agg_urusan(cube))}
+
+def ep_skpd(v, q, nama=None):
+    cube = v["cube"]
+    if nama is None:
+        s = cube[("SKPD",)][["total","items","indikator"]].reset_index()
+        return {"skpd": records(s.sort_values("total", ascending=False))}
+    if nama not in cube[("SKPD",)].index:
+        raise NotFound(f"SKPD tidak ditemukan: {nama}")
+    ks = d.agg_kategori_skpd(cube, nama)
+    return {"skpd": nama, "total": float(ks["Jumlah"].sum()), "kategori": records(ks)}
+
+def ep_otsus(v, q):
+    sa = d.agg_otsus_sektor(v["cube"]).iloc[::-1]
+    return {"total": v["cube"]["kpi"]["otsus"], "sektor": records(sa)}
+
+def ep_hibah(v, q):
+    cube = v["cube"]
+    h = need(cube, "hibah")
+    if q.get("jenis"):
+        h = h[h["JENIS_HIBAH"] == q["jenis"].upper()]
+    h = h.sort_values("BESARAN_NUM", ascending=False)
+    lim, off = page(q)
+    rows = h.iloc[off:off+lim][["NO","NAMA_PENERIMA","ALAMAT","BESARAN_NUM","JENIS_HIBAH"]].astype({"JENIS_HIBAH":str})
+    return {"jenis": {k: float(x) for k, x in cube["hibah_jenis"].items()},
+            "total": len(h), "offset": off, "hasil": records(rows)}
+
+def ep_bantuan(v, q):
+    cube = v["cube"]
+    return {"jenis": {k: float(x) for k, x in need(cube, "bantuan_jenis").items()},
+            "kab_kota": records(d.agg_bantuan_kab(cube).iloc[::-1].astype({"Kab/Kota":str, "Jenis":str}))}
+
+def ep_search(v, q):
+    s = q.get("q", "")
+    if len(s) < 2:
+        raise ValueError("Parameter q minimal 2 karakter.")
+    lim, off = page(q)
+    ix = d.load_search("lamp2", v)
+    pos, n = d.search(ix, s, limit=lim, offset=off)
+    rows = ix["df"].iloc[pos][["KODE_REKENING","URAIAN","JUMLAH_NUM","KAT","SKPD","HAL_NUM"]]
+    rows = rows.astype({"KAT":str, "SKPD":str, "HAL_NUM":object})
+    return {"q": s, "total": n, "offset": off, "hasil": records(rows)}
+
+ROUTES = {"ringkasan": ep_ringkasan, "skpd": ep_skpd, "otsus": ep_otsus,
+          "hibah": ep_hibah, "bantuan": ep_bantuan, "search": ep_search}
+
+
+# ════════════════════════════════════════════
+# CACHE RESPONS
+# ════════════════════════════════════════════
+
+_cache, _lock = OrderedDict(), threading.Lock()
+
+def version_for(q):
+    """Versi data untuk satu request (SQLite: ?tahun=, default terbaru)."""
+    return d.load_version(q.get("tahun"))
+
+def respond(path, q):
+    """(body, body_gzip, etag) untuk satu URL; dihitung sekali per versi data."""
+    v = version_for(q)
+    key = (v["ver"], path, tuple(sorted(q.items())))
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    parts = [unquote(p) for p in path.strip("/").split("/")]
+    if len(parts) < 2 or parts[0] != "api" or parts[1] not in ROUTES or len(parts) > 3 \
+            or (len(parts) == 3 and parts[1] != "skpd"):
+        raise NotFound(f"Endpoint tidak dikenal: {path}")
+    out = ROUTES[parts[1]](v, q, *parts[2:])
+    body = json.dumps(out, ensure_ascii=False, default=str).encode("utf-8")
+    tag = hashlib.sha256(repr(key).encode()).hexdigest()[:20]
+    val = (body, gzip.compress(body, 6), tag)
+    with _lock:
+        _cache[key] = val
+        while len(_cache) > CACHE_N:
+            _cache.popitem(last=False)
+    return val
+
+
+# ════════════════════════════════════════════
+# SERVER
+# ════════════════════════════════════════════
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "apba-api/1.0"
+
+    def send(self, code, body=b"", etag=None, gz=False):
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Vary", "Accept-Encoding")
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", f"public, max-age={MAX_AGE}")
+        if gz:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def error(self, code, msg):
+        self.send(code, json.dumps({"error": msg}, ensure_ascii=False).encode("utf-8"))
+
+    def do_GET(self):
+        u = urlsplit(self.path)
+        q = {k: v[-1] for k, v in parse_qs(u.query).items()}
+        try:
+            body, bgz, tag = respond(u.path, q)
+        except NotFound as e:
+            return self.error(404, str(e))
+        except ValueError as e:
+            return self.error(400, str(e))
+        except Exception as e:
+            self.log_error("%s: %s", type(e).__name__, e); traceback.print_exc()
+            return self.error(500, "Kesalahan internal server.")
+        gz = "gzip" in self.headers.get("Accept-Encoding", "")
+        etag = f'"{tag}-gz"' if gz else f'"{tag}"'
+        inm = self.headers.get("If-None-Match", "")
+        if etag in [t.strip() for t in inm.split(",")] or inm.strip() == "*":
+            return self.send(304, etag=etag)
+        self.send(200, bgz if gz else body, etag, gz)
+
+    do_HEAD = do_GET
+
+
+def main():
+    ap = argparse.ArgumentParser(description="API JSON APBA 2025")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8502)
+    a = ap.parse_args()
+    d.load_search("lamp2", version_for({}))
+    srv = ThreadingHTTPServer((a.host, a.port), Handler)
+    print(f"API APBA di http://{a.host}:{a.port}/api/ringkasan")
+    srv.serve_forever()
+
+if __name__ == "__main__":
+    main()
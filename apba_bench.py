@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Benchmark load_data & komputasi tiap halaman dashboard APBA pada data
+lampiran sintetis berskala 1×/10×/100× (tanpa browser)
+
+    python apba_bench.py [--scales 1,10,100] [--repeat 3] [--out bench_results.json]
+    python apba_bench.py --baseline bench_baseline.json      # exit 1 bila regresi
+    python apba_bench.py --save-baseline bench_baseline.json
+
+Lampiran II disampel ulang dari pohon kode/uraian/halaman/indikator di
+MASTER_01_RINCIAN_APBD.csv; lampiran III/V/VII dibangkitkan dari daftar
+nama. Tiap skala dijalankan di subprocess tersendiri. Puncak memori direset
+di awal tiap fase (lihat mem_reset), jadi peak_mb fase = puncak selama fase
+itu saja dan delta_mb = puncak di atas memori saat fase dimulai.
+"""
+
+import argparse, json, os, platform, re, resource, shutil, subprocess, sys, time, tracemalloc
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MASTER = os.path.join(HERE, "MASTER_01_RINCIAN_APBD.csv")
+BENCH_DIR = os.environ.get("APBA_BENCH_DIR", ".apba_bench")
+BASE_ROWS = {"lamp2": 10_000, "lamp3": 620, "lamp5": 190, "lamp7": 60}
+
+KAB = ["Kota Banda Aceh","Kab. Aceh Besar","Kab. Pidie","Kab. Pidie Jaya","Kab. Bireuen",
+       "Kota Lhokseumawe","Kab. Aceh Utara","Kab. Aceh Timur","Kota Langsa","Kab. Aceh Tamiang",
+       "Kab. Aceh Tengah","Kab. Bener Meriah","Kab. Gayo Lues","Kab. Aceh Tenggara","Kab. Aceh Barat",
+       "Kab. Nagan Raya","Kab. Aceh Barat Daya","Kab. Aceh Selatan","Kota Subulussalam","Kab. Aceh Singkil",
+       "Kab. Simeulue","Kab. Aceh Jaya","Kota Sabang"]
+LEMBAGA = ["Yayasan","Dayah","Masjid","Meunasah","Pesantren","Lembaga","Kelompok Tani","Koperasi",
+           "Ikatan","Majelis Taklim","Balai Pengajian","Sanggar"]
+NAMA = ["Al-Ikhlas","Nurul Huda","Darul Ulum","Baitussalam","Darussalam","Babussalam","Al-Falah",
+        "Nurul Iman","Raudhatul Jannah","Mon Mata","Seulanga","Cut Nyak Dhien","Teuku Umar",
+        "Malikussaleh","Jeumpa","Peusangan","Bungong Jeumpa","Al-Muslimun","Hidayatullah","Ar-Rahman"]
+GAMPONG = ["Lampineung","Ulee Kareng","Lamteumen","Peunayong","Keudah","Lhong Raya","Blang Padang",
+           "Meunasah Baro","Cot Girek","Pante Raja","Ujong Blang","Lam Ara","Kuta Alam","Geuceu"]
+
+
+# ════════════════════════════════════════════
+# DATA SINTETIS
+# ════════════════════════════════════════════
+
+def synth(out, scale, seed=0):
+    """Tulis keempat CSV lampiran berskala `scale` ke direktori `out`."""
+    import dashboard_apba_2025 as d
+    rng = np.random.default_rng(seed)
+    os.makedirs(out, exist_ok=True)
+
+    m = pd.read_csv(MASTER, dtype=str, usecols=["kode_rekening","uraian","level","halaman_sumber",
+                                                "indikator","jumlah_rp"])
+    n = BASE_ROWS["lamp2"] * scale
+    i = np.sort(rng.integers(0, len(m), n))     # urut halaman seperti dokumen asli
+    s = m.iloc[i].reset_index(drop=True)
+    amt = pd.to_numeric(s["jumlah_rp"], errors="coerce") * rng.lognormal(0, .35, n)
+    pd.DataFrame({"NO": np.arange(1, n+1), "KODE_REKENING": s["kode_rekening"], "URAIAN": s["uraian"],
+                  "JUMLAH_RP": amt.round(2), "LEVEL": s["level"], "HALAMAN": s["halaman_sumber"],
+                  "INDIKATOR": s["indikator"]}).to_csv(os.path.join(out, d.SRC["lamp2"]), index=False)
+
+    n = BASE_ROWS["lamp3"] * scale
+    no = np.arange(1, n+1).astype(str).astype(object); no[rng.random(n) < .01] = ""   # baris subtotal
+    pd.DataFrame({"NO": no,
+                  "NAMA_PENERIMA": [f"{a} {b} {g}" for a, b, g in zip(rng.choice(LEMBAGA, n), rng.choice(NAMA, n),
+                                                                      rng.choice(GAMPONG, n))],
+                  "ALAMAT": [f"Gampong {g}, {k}" for g, k in zip(rng.choice(GAMPONG, n), rng.choice(KAB, n))],
+                  "BESARAN_RP": rng.integers(5, 2000, n) * 1e6,
+                  "JENIS_HIBAH": rng.choice(["UANG","BARANG"], n, p=[.7,.3]),
+                  "HALAMAN": np.sort(rng.integers(1100, 1100 + 100*scale, n)),
+                  }).to_csv(os.path.join(out, d.SRC["lamp3"]), index=False)
+
+    n = BASE_ROWS["lamp5"] * scale
+    pd.DataFrame({"NO": np.arange(1, n+1), "NAMA_PENERIMA": rng.choice(KAB, n),
+                  "JENIS": rng.choice(["UMUM","KHUSUS"], n), "BESARAN_RP": rng.integers(1, 900, n) * 1e7,
+                  "HALAMAN": np.sort(rng.integers(1200, 1200 + 50*scale, n)),
+                  }).to_csv(os.path.join(out, d.SRC["lamp5"]), index=False)
+
+    rows, ks = [], list(d.UN) + ["2.15", "4.01", "7.01"]
+    for j in range(BASE_ROWS["lamp7"] * scale):
+        k = ks[j % len(ks)]
+        rows.append((f"{k}.{j // len(ks) + 1:02d}", f"Program {k}.{j // len(ks) + 1}",
+                     float(rng.integers(1, 999) * 1e8)))
+    pd.DataFrame(rows, columns=["KODE_REKENING","URAIAN","JUMLAH_RP"]).assign(HALAMAN="1300") \
+        .to_csv(os.path.join(out, d.SRC["lamp7"]), index=False)
+
+
+# ════════════════════════════════════════════
+# FASE
+# ════════════════════════════════════════════
+
+def rss_mb():
+    r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return r / 2**20 if sys.platform == "darwin" else r / 2**10
+
+# ── Puncak memori per fase ──
+# ru_maxrss adalah puncak sejak proses mulai, sehingga fase kecil setelah fase
+# besar ikut "mewarisi" puncaknya. Di Linux puncak RSS (VmHWM) direset per fase
+# lewat /proc/self/clear_refs. Di OS lain dipakai tracemalloc + reset_peak():
+# hanya alokasi Python/NumPy yang terhitung dan fase berjalan lebih lambat,
+# sehingga hasilnya ditandai "mem" dan tidak dibandingkan dengan mode lain.
+
+def _status_mb(key):
+    with open("/proc/self/status") as fh:
+        return int(re.search(rf"^{key}:\s+(\d+)", fh.read(), re.M).group(1)) / 2**10
+
+def mem_mode():
+    try:
+        with open("/proc/self/clear_refs", "w") as fh: fh.write("5")
+        _status_mb("VmHWM")
+        return "rss"
+    except (OSError, AttributeError):
+        tracemalloc.start()
+        return "tracemalloc"
+
+def mem_reset(mode):
+    """Reset puncak; kembalikan memori saat ini (MB)."""
+    if mode == "rss":
+        with open("/proc/self/clear_refs", "w") as fh: fh.write("5")
+        return _status_mb("VmRSS")
+    tracemalloc.reset_peak()
+    return tracemalloc.get_traced_memory()[0] / 2**20
+
+def mem_peak(mode):
+    """Puncak (MB) sejak mem_reset terakhir."""
+    return _status_mb("VmHWM") if mode == "rss" else tracemalloc.get_traced_memory()[1] / 2**20
+
+def check(ok, msg):
+    """assert yang tetap berlaku di bawah python -O."""
+    if not ok: raise AssertionError(msg)
+
+def same_data(a, b):
+    """Hasil _build_data() harus identik untuk berapa pun worker (nilai, dtype, urutan)."""
+    (fa, ta), (fb, tb) = a, b
+    for x, y in zip(fa[:-1], fb[:-1]):
+        pd.testing.assert_frame_equal(x, y, check_exact=True)
+    check(fa[-1] == fb[-1] and list(ta) == list(tb), "urusan_inv / kolom teks berbeda antar jumlah worker")
+    for k in ta:
+        pd.testing.assert_series_equal(ta[k], tb[k], check_exact=True)
+
+def same_cube(a, b):
+    """Cube hasil hot reload harus identik dengan cube dari build penuh."""
+    for k in ("belanja", "hibah", "bantuan", *(k for k in a if isinstance(k, tuple))):
+        pd.testing.assert_frame_equal(a[k], b[k], check_exact=True)
+    for k in ("otsus", "hibah_jenis", "bantuan_jenis", "bantuan_kab"):
+        pd.testing.assert_series_equal(a[k], b[k], check_exact=True)
+    check(a["kpi"] == b["kpi"], f"KPI berbeda: {a['kpi']} vs {b['kpi']}")
+
+def run_scale(data, repeat):
+    """Dijalankan di subprocess dengan cwd = direktori data sintetis."""
+    os.chdir(data)
+    os.environ["APBA_CACHE_DIR"] = os.path.join(data, ".cache")
+    shutil.rmtree(os.environ["APBA_CACHE_DIR"], ignore_errors=True)
+    sys.path.insert(0, HERE)
+    import dashboard_apba_2025 as d
+    res, mode = {}, mem_mode()
+
+    def phase(name, fn, n=1):
+        base, ts = mem_reset(mode), []
+        for _ in range(n):
+            t = time.perf_counter(); v = fn(); ts.append(time.perf_counter() - t)
+        pk = mem_peak(mode)
+        res[name] = {"s": round(float(np.median(ts)), 4), "peak_mb": round(pk, 1),
+                     "delta_mb": round(pk - base, 1)}
+        return v
+
+    phase("csv_parse", lambda: [d.read_typed(n) for n in d.SRC])
+    out, text = phase("build_data", d._build_data)
+    for w in (1, len(d.SRC)):
+        same_data((out, text), phase(f"build_data_w{w}", lambda: d._build_data(workers=w)))
+    key = phase("data_version", d.data_version)
+    phase("snapshot_save", lambda: d._snap_save(key, out, text))
+    out = phase("snapshot_load", lambda: d._snap_load(key), repeat)
+    lamp2, lamp3, lamp5, lamp7, skpd_df, urusan_inv = out
+    cube = phase("build_cube", lambda: d.build_cube(*out))
+    cube["ver"] = key
+    sx = phase("build_search", lambda: {
+        "lamp2": d.build_search(lamp2, ["KODE_REKENING","URAIAN","INDIKATOR"], kode="KODE_REKENING",
+                                amount="JUMLAH_NUM", text={"INDIKATOR": d.load_text("lamp2","INDIKATOR")}),
+        "hibah": d.build_search(cube["hibah"], ["NAMA_PENERIMA","ALAMAT"], amount="BESARAN_NUM")})
+    rx = phase("build_recipients", lambda: d.build_recipients(cube))
+    tree = phase("build_tree", lambda: d.build_tree(lamp2))
+    tree["ver"] = key
+    phase("validate_tree", lambda: d.validate_tree(tree), repeat)
+
+    # Komputasi tiap pg_* tanpa render: agregasi, figure → JSON, satu halaman
+    # tabel terurut (ptable) yang diformat Styler; ekspor hanya saat diminta
+    sel = cube[("SKPD",)]["total"].idxmax()
+
+    def page(dsid, base, rows, col, money):
+        o = d.order_rows(dsid, base, rows, col)
+        return base.iloc[o[:100]].style.format({money: "{:,.0f}"}).to_html()
+
+    def eksplorasi():
+        d.fig_proporsi(cube, sel).to_json(); d.fig_kategori_skpd(cube, sel).to_json()
+        sd = cube["skpd_rows"](sel)
+        fp = np.sort(sd.index.get_indexer(d.search(sx["lamp2"], "belanja", within=sd.index)[0]))
+        return page(("eksplorasi", key, sel), sd, fp, "JUMLAH_NUM", "JUMLAH_NUM")
+
+    def hibah():
+        d.fig_hibah_jenis(cube).to_json(); d.fig_bantuan_kab(cube).to_json()
+        h = cube["hibah"]
+        fp = np.flatnonzero(h["JENIS_HIBAH"].isin(["UANG","BARANG"]).to_numpy())
+        fp = np.sort(d.search(sx["hibah"], "yayasan", within=fp)[0])
+        d.agg_top_penerima(rx).style.format({"Besaran (Rp)": "{:,.0f}"}).to_html()
+        d.recipient_rows(rx, d.recipient_lookup(rx, h["NAMA_PENERIMA"].iat[0]))
+        return page(("hibah", key), h, fp, "BESARAN_NUM", "BESARAN_NUM")
+
+    def pencarian():
+        pos, n = d.search(sx["lamp2"], "pendidikan")
+        return page(("lamp2", key), sx["lamp2"]["df"], pos, None, "JUMLAH_NUM")
+
+    def rekening():
+        k = tree["akun"][min(tree["akun"])]
+        node = k[np.argmax(tree["df"]["ANAK"].to_numpy()[k])]
+        kids = d.tree_kids(tree, node)
+        d.tree_total(tree, kids); d.fig_rekening(tree, kids).to_json()
+        return page(("rekening", key), tree["df"], kids, "JUMLAH_NUM", "JUMLAH_NUM")
+
+    pages = {
+        "pg_ringkasan": lambda: [d.agg_kpi(cube), *(f(cube).to_json() for f in
+                                 (d.fig_komposisi, d.fig_top_skpd, d.fig_urusan))],
+        "pg_eksplorasi": eksplorasi,
+        "pg_otsus": lambda: [d.fig_otsus_sektor(cube).to_json(), d.fig_otsus_aliran(cube).to_json(),
+                             page(("otsus", key), lamp7, cube["otsus_pos"],
+                                  "JUMLAH_NUM", "JUMLAH_NUM")],
+        "pg_hibah": hibah,
+        "pg_analisis": lambda: [d.fig_heatmap(cube).to_json(), d.fig_korelasi(cube).to_json(),
+                                d.fig_radar(cube, d.top10_skpd(cube)[:3]).to_json()],
+        "pg_search": pencarian,
+        "pg_rekening": rekening,
+    }
+    for name, fn in pages.items():
+        phase(name, fn, repeat)
+    rows = sx["lamp2"]["df"].iloc[d.search(sx["lamp2"], "belanja")[0]]
+    for fmt in d.EXPORT_FMT:
+        phase(f"export {fmt}", lambda: d.export_bytes(rows, fmt))
+
+    # Hot reload: hapus satu baris Lampiran V → hanya lamp5 (+ cube bantuan,
+    # indeks penerima) dihitung ulang; hasil harus sama dengan build penuh
+    v1 = phase("version_cold", d.current_version)
+    d.load_tree(v1)
+    f5 = d.SRC["lamp5"]; st5 = os.stat(f5)
+    with open(f5, "rb") as fh: raw = fh.read()
+    try:
+        ln = raw.split(b"\n")
+        with open(f5, "wb") as fh: fh.write(b"\n".join([ln[0], *ln[2:]]))
+        d.data_versions()["t"] = 0.0
+        v2 = phase("reload_lamp5", d.current_version)
+        check(v2["changed"] == ["lamp5"] and v2["art"]["tree"] is v1["art"]["tree"],
+              f"reload lamp5 membangun ulang lebih dari perlu: {v2['changed']}")
+        same_cube(v2["cube"], d.build_cube(*d._build_data()[0]))
+        phase("reload_recipients", lambda: d.load_recipients(v2))
+    finally:
+        with open(f5, "wb") as fh: fh.write(raw)
+        os.utime(f5, ns=(st5.st_atime_ns, st5.st_mtime_ns))
+    return {"rows": {k: len(v) for k, v in zip(d.FRAMES, out)}, "peak_mb": round(rss_mb(), 1),
+            "mem": mode, "phases": res}
+
+
+# ════════════════════════════════════════════
+# REGRESI
+# ════════════════════════════════════════════
+
+def compare(cur, base, tol, min_s=0.25, min_mb=20):
+    """Daftar regresi: fase yang > (1+tol)× baseline dan melewati ambang absolut.
+    Baseline dengan cara ukur memori lain (atau tanpa "mem") ditolak, karena
+    puncak RSS dan tracemalloc tidak dapat dibandingkan."""
+    bad = []
+    for sc, r in cur["results"].items():
+        b = base["results"].get(sc)
+        if not b: continue
+        if b.get("mem") != r["mem"]:
+            bad.append(f"{sc}: baseline diukur dengan mem={b.get('mem')}, sekarang mem={r['mem']}; "
+                       "simpan ulang baseline (--save-baseline)")
+            continue
+        for ph, v in r["phases"].items():
+            o = b["phases"].get(ph)
+            if not o: continue
+            if v["s"] > o["s"] * (1 + tol) and v["s"] - o["s"] > min_s:
+                bad.append(f"{sc} {ph}: {o['s']:.3f}s → {v['s']:.3f}s")
+        if r["peak_mb"] > b["peak_mb"] * (1 + tol) and r["peak_mb"] - b["peak_mb"] > min_mb:
+            bad.append(f"{sc} peak: {b['peak_mb']:.0f} MB → {r['peak_mb']:.0f} MB")
+    return bad
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark dashboard APBA 2025")
+    ap.add_argument("--scales", default="1,10,100")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default="bench_results.json")
+    ap.add_argument("--baseline", help="bandingkan dengan hasil tersimpan, exit 1 bila regresi")
+    ap.add_argument("--tolerance", type=float, default=0.75)
+    ap.add_argument("--save-baseline", metavar="PATH")
+    ap.add_argument("--run-scale", help=argparse.SUPPRESS)
+    a = ap.parse_args()
+
+    if a.run_scale:
+        print(json.dumps(run_scale(a.run_scale, a.repeat)))
+        return
+
+    cur = {"meta": {"python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+                    "machine": platform.machine(), "cpu": os.cpu_count(), "repeat": a.repeat,
+                    "time": time.strftime("%Y-%m-%dT%H:%M:%S")}, "results": {}}
+    for sc in [int(x) for x in a.scales.split(",")]:
+        data = os.path.abspath(os.path.join(BENCH_DIR, f"{sc}x-s{a.seed}"))
+        if not os.path.isdir(data):
+            t = time.perf_counter(); synth(data, sc, a.seed)
+            print(f"[{sc}×] data sintetis → {data} ({time.perf_counter()-t:.1f}s)")
+        p = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-scale", data, "--repeat", str(a.repeat)],
+                           capture_output=True, text=True)
+        if p.returncode:
+            sys.exit(f"[{sc}×] gagal:\n{p.stderr[-2000:]}")
+        r = cur["results"][f"{sc}x"] = json.loads(p.stdout.strip().splitlines()[-1])
+        print(f"[{sc}×] {r['rows']['lamp2']:,} baris lamp2 · puncak {r['peak_mb']:.0f} MB")
+        for ph, v in r["phases"].items():
+            print(f"    {ph:<15}{v['s']:>9.3f}s {v['peak_mb']:>9.1f} MB  (+{v['delta_mb']:.1f})")
+
+    with open(a.out, "w") as fh: json.dump(cur, fh, indent=1)
+    if a.save_baseline:
+        with open(a.save_baseline, "w") as fh: json.dump(cur, fh, indent=1)
+    if a.baseline:
+        with open(a.baseline) as fh: bad = compare(cur, json.load(fh), a.tolerance)
+        for b in bad: print("REGRESI", b)
+        if bad: sys.exit(1)
+        print(f"Tidak ada regresi (toleransi {a.tolerance:.0%}).")
+
+if __name__ == "__main__":
+    main()
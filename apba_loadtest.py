@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Uji beban multi-sesi dashboard APBA 2025 lewat streamlit.testing (AppTest)
+
+    python apba_loadtest.py [--sessions 8] [--rounds 2] [--out loadtest.json]
+
+Tiap sesi = satu AppTest di thread sendiri yang berpindah ke semua halaman
+navigasi sebanyak --rounds putaran (sesi ke-i mulai dari halaman ke-i agar
+halaman berbeda dirender bersamaan). Semua sesi berada di satu proses,
+sehingga cache_resource (versi data, cache figure) dibagi seperti di satu
+container. Dijalankan dari direktori berisi CSV lampiran.
+
+Laporan: throughput (rerun/detik), latensi p50/p95/p99 per halaman, dan RSS
+awal/puncak/akhir (sampel tiap 50 ms) selama fase terukur. Latensi AppTest
+mencakup overhead runner-nya; waktu render di sisi aplikasi (phase(), dari
+APBA_PERF_LOG JSONL — file sementara bila tidak diset) dilaporkan terpisah.
+
+Batas: agar banyak AppTest dapat berjalan bersamaan, skrip ini menambal
+internal privat streamlit.testing (Runtime._instance, ScriptCache,
+patch_config_options; lihat di bawah). Internal itu dapat berubah antar
+rilis, jadi hanya versi Streamlit di requirements-loadtest.txt yang didukung;
+versi lain ditolak di awal alih-alih menghasilkan angka yang keliru.
+"""
+
+import argparse, contextlib, json, os, sys, tempfile, threading, time
+import numpy as np
+import streamlit
+
+ST_VERSI = "1.66"     # versi Streamlit tempat tambalan di bawah diuji
+if streamlit.__version__.rsplit(".", 1)[0] != ST_VERSI:
+    sys.exit(f"apba_loadtest.py hanya mendukung streamlit=={ST_VERSI}.* (terpasang {streamlit.__version__}); "
+             "pasang lewat: pip install -r requirements-loadtest.txt")
+
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest, app_test, local_script_runner
+from streamlit.testing.v1.util import patch_config_options
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# AppTest dirancang untuk satu run pada satu waktu: tiap run memasang Runtime
+# tiruan global lalu mengosongkannya, menambal config "global.appTest" lalu
+# memulihkannya, dan meng-compile skrip ulang (ast.parse paralel tidak aman
+# di CPython 3.11). Seperti satu server Streamlit, semua sesi di sini memakai
+# satu runtime (runtime tiruan pertama dipertahankan), satu ScriptCache, dan
+# config test yang dipasang sekali selama uji (lihat run()).
+class _SharedMeta(type(Runtime)):
+    def __setattr__(cls, k, v):
+        if k != "_instance":
+            super().__setattr__(k, v)
+        elif v is not None and Runtime._instance is None:
+            Runtime._instance = v
+
+class _SharedRuntime(Runtime, metaclass=_SharedMeta):
+    pass
+
+_SCRIPTS = ScriptCache()
+app_test.Runtime = _SharedRuntime
+app_test.ScriptCache = local_script_runner.ScriptCache = lambda: _SCRIPTS
+app_test.patch_config_options = lambda o: contextlib.nullcontext()
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return 0.0
+
+class Sampler(threading.Thread):
+    """RSS proses tiap `dt` detik sampai stop()."""
+    def __init__(self, dt=0.05):
+        super().__init__(daemon=True)
+        self.dt, self.mb, self.halt = dt, [rss_mb()], threading.Event()
+
+    def run(self):
+        while not self.halt.wait(self.dt):
+            self.mb.append(rss_mb())
+
+    def stop(self):
+        self.halt.set(); self.join()
+        self.mb.append(rss_mb())
+        return {"start_mb": round(self.mb[0], 1), "peak_mb": round(max(self.mb), 1),
+                "end_mb": round(self.mb[-1], 1), "mean_mb": round(float(np.mean(self.mb)), 1)}
+
+
+def session(app, pages, start, rounds, timeout, log):
+    """Satu sesi: buka aplikasi (halaman pertama) lalu klik tiap halaman `rounds` kali."""
+    at = AppTest.from_file(app, default_timeout=timeout)
+    for p in [None] + [pages[(start + i) % len(pages)] for _ in range(rounds) for i in range(len(pages))]:
+        t = time.perf_counter()
+        try:
+            (at if p is None else at.sidebar.radio[0].set_value(p)).run()
+            err = [e.message for e in at.exception]
+        except Exception as e:          # timeout AppTest, dsb.
+            err = [f"{type(e).__name__}: {e}"]
+        log.append((p or pages[0], time.perf_counter() - t, err))
+
+
+@patch_config_options({"global.appTest": True})
+def run(app, sessions, rounds, timeout=300):
+    perf_log, tmp = os.environ.get("APBA_PERF_LOG"), None
+    if not perf_log:
+        fd, tmp = tempfile.mkstemp(suffix=".jsonl"); os.close(fd)
+        perf_log = os.environ["APBA_PERF_LOG"] = tmp
+    # pemanasan: cold start + tiap halaman sekali (data, indeks & cache figure terisi)
+    t = time.perf_counter()
+    at = AppTest.from_file(app, default_timeout=timeout).run()
+    pages = list(at.sidebar.radio[0].options)
+    for p in pages: at.sidebar.radio[0].set_value(p).run()
+    warm = time.perf_counter() - t
+
+    log, smp = [], Sampler()
+    smp.start()
+    t, t0 = time.perf_counter(), time.time()
+    th = [threading.Thread(target=session, args=(app, pages, i, rounds, timeout, log), name=f"sesi-{i}")
+          for i in range(sessions)]
+    for x in th: x.start()
+    for x in th: x.join()
+    wall = time.perf_counter() - t
+    mem = smp.stop()
+
+    def stats(ts):
+        ms = np.asarray(ts) * 1e3
+        return {"n": len(ms), **{f"p{q}_ms": round(float(np.percentile(ms, q)), 1) for q in (50, 95, 99)},
+                "max_ms": round(float(ms.max()), 1)}
+
+    render = []
+    if not perf_log.endswith(".prom"):
+        with open(perf_log) as fh:
+            render = [r["total_ms"] / 1e3 for r in map(json.loads, fh) if r["ts"] >= t0]
+        if tmp:
+            os.remove(tmp); del os.environ["APBA_PERF_LOG"]
+
+    errors = [f"{p}: {e}" for p, _, err in log for e in err]
+    return {"sessions": sessions, "rounds": rounds, "warmup_s": round(warm, 2), "wall_s": round(wall, 2),
+            "reruns": len(log), "throughput": round(len(log) / wall, 2),
+            "all": stats([s for _, s, _ in log]),
+            "pages": {p: stats([s for q, s, _ in log if q == p]) for p in pages},
+            "render": stats(render) if render else None, "rss": mem, "errors": errors}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Uji beban multi-sesi dashboard APBA 2025")
+    ap.add_argument("--sessions", type=int, default=8)
+    ap.add_argument("--rounds", type=int, default=2)
+    ap.add_argument("--app", default=os.path.join(HERE, "dashboard_apba_2025.py"))
+    ap.add_argument("--timeout", type=float, default=300, help="batas detik per rerun")
+    ap.add_argument("--out", help="simpan hasil sebagai JSON")
+    a = ap.parse_args()
+
+    r = run(a.app, a.sessions, a.rounds, a.timeout)
+    print(f"{r['sessions']} sesi × {r['rounds']} putaran: {r['reruns']} rerun dalam {r['wall_s']:.1f}s "
+          f"→ {r['throughput']:.2f} rerun/s (pemanasan {r['warmup_s']:.1f}s)")
+    rows = {**r["pages"], "SEMUA": r["all"]}
+    if r["render"]: rows["render aplikasi"] = r["render"]
+    for p, s in rows.items():
+        print(f"    {p:<26}{s['n']:>5}  p50 {s['p50_ms']:>8.0f}  p95 {s['p95_ms']:>8.0f}  "
+              f"p99 {s['p99_ms']:>8.0f}  max {s['max_ms']:>8.0f} ms")
+    m = r["rss"]
+    print(f"RSS awal {m['start_mb']:.0f} MB · puncak {m['peak_mb']:.0f} MB · akhir {m['end_mb']:.0f} MB "
+          f"· rata-rata {m['mean_mb']:.0f} MB")
+    for e in r["errors"][:10]: print("ERROR", e)
+    if a.out:
+        with open(a.out, "w") as fh: json.dump(r, fh, indent=1)
+    if r["errors"]: sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Backend SQLite opsional untuk data APBA multi-tahun
+(skema terpadu MASTER_01_RINCIAN_APBD.csv)
+
+    python apba_sqlite.py ingest MASTER_01_RINCIAN_APBD.csv [--db apba.sqlite]
+    python apba_sqlite.py lampiran [--src .] [--tahun 2025]
+    APBA_BACKEND=sqlite streamlit run dashboard_apba_2025.py
+
+Ingest berjalan per chunk: baris rincian ditulis ke tabel `rincian`, sementara
+total, SKPD×KAT×Urusan, KPI dan otsus per sektor dilipat ke agregat berjalan
+(tabel agregat_*), sehingga memori puncak tidak bergantung ukuran file.
+"""
+
+import argparse, os, sqlite3
+from contextlib import closing
+import pandas as pd
+
+DB = os.environ.get("APBA_DB", "apba.sqlite")
+
+# ── Skema tabel rincian (kolom CSV master → tipe SQLite) ──
+COLS = {
+    "row_id":"INTEGER", "organisasi_id":"INTEGER", "kode_skpd":"TEXT", "nama_skpd":"TEXT",
+    "tipe_organisasi":"TEXT", "kode_urusan":"TEXT", "nama_urusan":"TEXT", "kategori_urusan":"TEXT",
+    "kode_rekening":"TEXT", "kode_akun":"TEXT", "kode_kelompok":"TEXT", "kode_jenis":"TEXT",
+    "kode_objek":"TEXT", "kode_rincian":"TEXT", "kode_sub_rincian":"TEXT", "level":"INTEGER",
+    "nama_level":"TEXT", "klasifikasi_akun":"TEXT", "kategori_belanja":"TEXT", "uraian":"TEXT",
+    "indikator":"TEXT", "jumlah_rp":"REAL", "halaman_sumber":"INTEGER", "lampiran":"TEXT",
+    "tahun_anggaran":"INTEGER", "sumber_data":"TEXT",
+}
+NUM = [c for c, t in COLS.items() if t != "TEXT"]
+
+INDEXES = {
+    "ix_thn_skpd_lvl": "tahun_anggaran, kode_skpd, level",
+    "ix_thn_lvl_akun": "tahun_anggaran, level, kode_akun",
+    "ix_rekening": "kode_rekening",
+    "ix_kelompok": "kode_kelompok",
+    "ix_jenis": "kode_jenis",
+    "ix_objek": "kode_objek",
+    "ix_rincian": "kode_rincian",
+    "ix_sub_rincian": "kode_sub_rincian",
+}
+
+# Sumbu cube dashboard → kolom master
+AX = {"SKPD":"nama_skpd", "KAT":"kategori_belanja", "Urusan":"nama_urusan"}
+BELANJA = "tahun_anggaran = ? AND level = 6 AND kode_akun = '5'"
+GRP = ["tahun_anggaran", "SKPD", "KAT", "Urusan"]
+CHUNK = 50_000
+
+
+# ════════════════════════════════════════════
+# INGEST
+# ════════════════════════════════════════════
+
+# ── Agregat berjalan ──
+# Ukurannya sebanding jumlah grup (tahun×SKPD×KAT×Urusan) dan pasangan unik
+# grup–indikator, bukan jumlah baris. Indikator disimpan sebagai pasangan unik
+# karena COUNT(DISTINCT) tidak bisa dijumlahkan antar chunk/sumbu.
+
+def fold_new():
+    return {"grp": None, "ind": None, "kpi": None, "otsus": None}
+
+def _add(a, b):
+    return b if a is None else a.add(b, fill_value=0)
+
+def fold(acc, ch):
+    """Lipat satu chunk berkolom master (SKPD/KAT/Urusan sudah terisi) ke `acc`."""
+    lv = ch[pd.to_numeric(ch["level"], errors="coerce") == 6]
+    akun = lv["kode_akun"].where(lv["kode_akun"].isin(["4", "5"]))
+    k = lv.groupby(["tahun_anggaran", akun])["jumlah_rp"].sum().unstack(fill_value=0)
+    acc["kpi"] = _add(acc["kpi"], k.reindex(columns=["4", "5"], fill_value=0))
+    b = lv[lv["kode_akun"] == "5"].fillna({"SKPD": "N/A", "KAT": "N/A", "Urusan": "N/A"})
+    acc["grp"] = _add(acc["grp"], b.groupby(GRP)["jumlah_rp"].agg(total="sum", items="count", rows="size"))
+    u = b[[*GRP, "indikator"]].dropna().drop_duplicates()
+    acc["ind"] = u if acc["ind"] is None else pd.concat([acc["ind"], u]).drop_duplicates()
+
+def fold_save(con, acc):
+    """Tulis agregat ke tabel staging; tahun yang dilipat menggantikan isi
+    tabel agregat lama saat _swap."""
+    tabs = {}
+    if acc["grp"] is not None: tabs["agregat"] = acc["grp"].reset_index()
+    if acc["ind"] is not None: tabs["agregat_indikator"] = acc["ind"]
+    if acc["kpi"] is not None:
+        tabs["agregat_kpi"] = acc["kpi"].rename(columns={"4": "pend", "5": "bel"}) \
+            .reindex(columns=["pend", "bel", "otsus"]).reset_index()
+    if acc["otsus"] is not None: tabs["agregat_otsus"] = acc["otsus"].rename("total").reset_index()
+    for name, t in tabs.items():
+        t.to_sql(STG + name, con, if_exists="append", index=False)
+    return {int(y) for t in tabs.values() for y in t["tahun_anggaran"]}
+
+# ── Staging & swap ──
+# pandas.to_sql meng-commit tiap panggilan, jadi baris ditulis dulu ke tabel
+# stg_* (tidak dibaca siapa pun). Penggantian tahun di tabel asli — hapus,
+# salin dari staging, naikkan user_version — terjadi dalam satu transaksi:
+# pembaca melihat data lama atau baru seluruhnya, dan ingest yang gagal di
+# tengah jalan tidak mengubah apa pun (staging sisa dibuang ingest berikutnya).
+
+STG = "stg_"
+AGREGAT = ["agregat", "agregat_indikator", "agregat_kpi", "agregat_otsus"]
+
+def _tables(con, prefix):
+    return [r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type = 'table'") if r[0].startswith(prefix)]
+
+def _begin(db):
+    con = sqlite3.connect(db, isolation_level=None)     # transaksi dikelola eksplisit
+    for t in _tables(con, STG): con.execute(f"DROP TABLE {t}")
+    for t in ("rincian", STG + "rincian"):
+        con.execute(f"CREATE TABLE IF NOT EXISTS {t} ({', '.join(f'{c} {ty}' for c, ty in COLS.items())})")
+    return con
+
+def _swap(con, ys):
+    """Ganti tahun `ys` di `rincian` dan semua tabel agregat dalam satu
+    transaksi. Tabel tanpa staging tetap dikosongkan untuk `ys` (mis. ingest
+    master tanpa Lampiran VII → agregat_otsus tahun itu tidak tersisa basi)."""
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        ada = set(_tables(con, ""))
+        for name in ("rincian", *AGREGAT):
+            stg = STG + name
+            if stg in ada:
+                con.execute(f"CREATE TABLE IF NOT EXISTS {name} AS SELECT * FROM {stg} WHERE 0")
+            elif name not in ada:
+                continue
+            con.executemany(f"DELETE FROM {name} WHERE tahun_anggaran = ?", [(y,) for y in sorted(ys)])
+            if stg in ada:
+                cols = ", ".join(f'"{r[1]}"' for r in con.execute(f"PRAGMA table_info({stg})"))
+                con.execute(f"INSERT INTO {name} ({cols}) SELECT {cols} FROM {stg} ORDER BY rowid")
+                con.execute(f"DROP TABLE {stg}")
+        con.execute(f"PRAGMA user_version = {con.execute('PRAGMA user_version').fetchone()[0] + 1}")
+        con.execute("COMMIT")
+    except BaseException:
+        con.execute("ROLLBACK")
+        raise
+
+def _finish(con, acc, ys):
+    _swap(con, ys | fold_save(con, acc))
+    for name, cols in INDEXES.items():
+        con.execute(f"CREATE INDEX IF NOT EXISTS {name} ON rincian ({cols})")
+    con.execute("ANALYZE")
+
+def ingest(csv, db=DB, chunksize=CHUNK):
+    """Muat CSV master ke tabel `rincian` per chunk. Tahun yang ada di file
+    diganti seluruhnya dalam satu transaksi, sehingga ingest ulang aman."""
+    acc = fold_new()
+    with closing(_begin(db)) as con:
+        seen, n = set(), 0
+        for ch in pd.read_csv(csv, dtype=str, chunksize=chunksize, encoding="utf-8-sig"):
+            ch = ch.reindex(columns=list(COLS))
+            for c in NUM:
+                ch[c] = pd.to_numeric(ch[c], errors="coerce")
+            seen.update(ch["tahun_anggaran"].dropna().astype(int))
+            ch.to_sql(STG + "rincian", con, if_exists="append", index=False)
+            fold(acc, ch.rename(columns={v: k for k, v in AX.items()}))
+            n += len(ch)
+        _finish(con, acc, seen)
+    return n
+
+def ingest_lampiran(src=".", db=DB, chunksize=CHUNK, tahun=2025):
+    """Ingest streaming CSV Lampiran II & VII: tiap chunk diklasifikasikan dengan
+    aturan dashboard (halaman → SKPD, prefix kode → kategori, SKPD → urusan,
+    kode program → sektor otsus), dilipat ke agregat, lalu ditulis ke `rincian`."""
+    import dashboard_apba_2025 as d
+    urusan = {n: d.UM.get(k, "Lainnya") for n, _, k, *_ in d.SM}
+    acc, n = fold_new(), 0
+    with closing(_begin(db)) as con:
+        for ch in d.read_chunks("lamp2", chunksize, src):
+            d.classify_lamp2(ch)
+            skpd = ch["SKPD"].astype(object)
+            out = pd.DataFrame({
+                "row_id": range(n, n + len(ch)), "kode_skpd": skpd, "nama_skpd": skpd,
+                "nama_urusan": skpd.map(urusan).fillna("Lainnya"),
+                "kode_rekening": ch["KODE_REKENING"], "kode_akun": ch["KODE_REKENING"].str.split(".").str[0],
+                "level": ch["LEVEL_NUM"].astype(float), "kategori_belanja": ch["KAT"].astype(object),
+                "uraian": ch["URAIAN"], "indikator": ch["INDIKATOR"].astype(object),
+                "jumlah_rp": ch["JUMLAH_NUM"], "halaman_sumber": ch["HAL_NUM"].astype(float),
+                "lampiran": "II", "tahun_anggaran": tahun, "sumber_data": d.SRC["lamp2"],
+            }).reindex(columns=list(COLS))
+            out.to_sql(STG + "rincian", con, if_exists="append", index=False)
+            fold(acc, out.rename(columns={v: k for k, v in AX.items()}))
+            n += len(ch)
+        ot = 0.0
+        for ch in d.read_chunks("lamp7", chunksize, src):
+            l7p, sek = d.classify_otsus(ch)
+            s = l7p["JUMLAH_NUM"].groupby(sek, observed=True).sum()
+            s.index = pd.MultiIndex.from_product([[tahun], s.index.astype(str)], names=["tahun_anggaran", "sektor"])
+            acc["otsus"] = _add(acc["otsus"], s)
+            ot += ch["JUMLAH_NUM"].sum()
+            pd.DataFrame({"kode_rekening": ch["KODE_REKENING"], "uraian": ch["URAIAN"], "jumlah_rp": ch["JUMLAH_NUM"],
+                          "halaman_sumber": ch["HAL_NUM"].astype(float), "lampiran": "VII", "tahun_anggaran": tahun,
+                          "sumber_data": d.SRC["lamp7"]}).reindex(columns=list(COLS)) \
+                .to_sql(STG + "rincian", con, if_exists="append", index=False)
+        if acc["kpi"] is not None and tahun in acc["kpi"].index:
+            acc["kpi"]["otsus"] = pd.Series({tahun: ot})
+        _finish(con, acc, {tahun})
+    return n
+
+
+# ════════════════════════════════════════════
+# QUERY
+# ════════════════════════════════════════════
+
+def connect(db=DB):
+    return closing(sqlite3.connect(f"file:{db}?mode=ro", uri=True, check_same_thread=False))
+
+def query(sql, params=(), db=DB):
+    with connect(db) as con:
+        return pd.read_sql_query(sql, con, params=params)
+
+def data_version(db=DB):
+    """Penanda isi database; naik tiap ingest (lihat _swap)."""
+    with connect(db) as con:
+        return con.execute("PRAGMA user_version").fetchone()[0]
+
+def years(db=DB):
+    return query("SELECT DISTINCT tahun_anggaran FROM rincian ORDER BY 1", db=db)["tahun_anggaran"].tolist()
+
+def _agregat(table, tahun, db):
+    """Baris tabel agregat_* untuk satu tahun; None bila belum pernah dilipat."""
+    try:
+        df = query(f"SELECT * FROM {table} WHERE tahun_anggaran = ?", (tahun,), db)
+    except pd.errors.DatabaseError:
+        return None
+    return df if len(df) else None
+
+def kpi(tahun, db=DB):
+    a = _agregat("agregat_kpi", tahun, db)
+    if a is not None:
+        r = a.iloc[0]
+        return {k: float(r[k]) for k in ("pend", "bel", "otsus") if k in r and pd.notna(r[k])}
+    r = query("""SELECT SUM(CASE WHEN kode_akun = '4' THEN jumlah_rp END) AS pend,
+                        SUM(CASE WHEN kode_akun = '5' THEN jumlah_rp END) AS bel
+                 FROM rincian WHERE tahun_anggaran = ? AND level = 6""", (tahun,), db).iloc[0]
+    return {"pend": r["pend"] or 0.0, "bel": r["bel"] or 0.0}
+
+def rollup(tahun, axes, db=DB):
+    """Agregat belanja level 6 per sumbu dashboard (SKPD/KAT/Urusan): dari agregat
+    yang dilipat saat ingest bila ada, jika tidak dihitung di SQL."""
+    a = _agregat("agregat", tahun, db)
+    if a is not None:
+        ax = list(axes)
+        df = a.groupby(ax)[["total","items","rows"]].sum().astype({"items":"int64","rows":"int64"})
+        ind = _agregat("agregat_indikator", tahun, db)
+        df["indikator"] = (ind.groupby(ax)["indikator"].nunique().reindex(df.index, fill_value=0)
+                           if ind is not None else 0)
+        return df
+    sel = ", ".join(f"COALESCE({AX[a]}, 'N/A') AS {a}" for a in axes)
+    df = query(f"""SELECT {sel}, SUM(jumlah_rp) AS total, COUNT(jumlah_rp) AS items,
+                          COUNT(*) AS rows, COUNT(DISTINCT indikator) AS indikator
+                   FROM rincian WHERE {BELANJA}
+                   GROUP BY {', '.join(axes)} ORDER BY {', '.join(axes)}""", (tahun,), db)
+    return df.set_index(list(axes))
+
+def otsus(tahun, db=DB):
+    """Alokasi otsus per sektor (Series JUMLAH_NUM) dari agregat Lampiran VII."""
+    a = _agregat("agregat_otsus", tahun, db)
+    if a is None:
+        return pd.Series(dtype=float, name="JUMLAH_NUM")
+    return a.set_index("sektor")["total"].rename("JUMLAH_NUM").rename_axis(None)
+
+def rincian(tahun, lampiran="II", db=DB):
+    """Baris satu lampiran & tahun dalam urutan ingest (= urutan dokumen),
+    berkolom frame lamp2 dashboard."""
+    df = query("""SELECT kode_rekening AS KODE_REKENING, uraian AS URAIAN, indikator AS INDIKATOR,
+                         level AS LEVEL_NUM, halaman_sumber AS HAL_NUM, jumlah_rp AS JUMLAH_NUM,
+                         nama_skpd AS SKPD, kategori_belanja AS KAT
+                  FROM rincian WHERE tahun_anggaran = ? AND lampiran = ? ORDER BY rowid""", (tahun, lampiran), db)
+    return df.astype({"LEVEL_NUM": "Int16", "HAL_NUM": "Int16", "SKPD": "category", "KAT": "category"})
+
+def skpd_rows(tahun, skpd, db=DB):
+    """Baris belanja level 6 satu SKPD (kolom mengikuti frame lamp2 dashboard)."""
+    return query(f"""SELECT row_id, kode_rekening AS KODE_REKENING, uraian AS URAIAN,
+                            jumlah_rp AS JUMLAH_NUM, kategori_belanja AS KAT, indikator AS INDIKATOR
+                     FROM rincian WHERE {BELANJA} AND kode_skpd IN
+                         (SELECT DISTINCT kode_skpd FROM rincian WHERE tahun_anggaran = ? AND nama_skpd = ?)
+                     ORDER BY rowid""",
+                 (tahun, tahun, skpd), db).set_index("row_id")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Backend SQLite APBA")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("ingest", help="muat CSV master ke database")
+    p.add_argument("csv", nargs="+")
+    p = sub.add_parser("lampiran", help="ingest streaming CSV lampiran II & VII dashboard")
+    p.add_argument("--src", default=".", help="direktori CSV lampiran")
+    p.add_argument("--tahun", type=int, default=2025)
+    for p in sub.choices.values():
+        p.add_argument("--db", default=DB)
+        p.add_argument("--chunksize", type=int, default=CHUNK)
+    a = ap.parse_args()
+    if a.cmd == "ingest":
+        for f in a.csv:
+            print(f"{f}: {ingest(f, a.db, a.chunksize):,} baris → {a.db}")
+    else:
+        print(f"{a.src}: {ingest_lampiran(a.src, a.db, a.chunksize, a.tahun):,} baris Lampiran II → {a.db}")
+    print("Tahun tersedia:", years(a.db))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Ekspor statis dashboard APBA 2025 untuk hosting CDN
+(tampilan default keenam halaman + eksplorasi per SKPD)
+
+    python apba_static.py [--out site] [--live-url https://...]
+
+Data dimuat sekali; chart dirender dengan fungsi fig_* yang sama dengan
+aplikasi Streamlit. Tiap chart juga ditulis sebagai JSON Plotly di json/.
+"""
+
+import argparse, html, json, os, re, shutil, time
+from plotly.offline import get_plotlyjs
+
+import dashboard_apba_2025 as d
+
+CSS = f"""
+body{{font-family:system-ui,sans-serif;margin:0;color:{d.CP['dark']}}}
+nav{{background:{d.CP['primary']};padding:10px 20px}} nav a{{color:#fff;margin-right:18px;text-decoration:none}}
+main{{padding:10px 24px}} h2{{color:{d.CP['primary']}}}
+.kpi{{display:flex;gap:16px;flex-wrap:wrap}} .kpi div{{background:{d.CP['light']};border-radius:8px;padding:10px 16px}}
+.kpi b{{display:block;font-size:1.4em}} .row{{display:flex;gap:16px}} .row>div{{flex:1;min-width:0}}
+.tbl{{max-height:420px;overflow:auto}} table{{border-collapse:collapse;font-size:.85em;width:100%}}
+td,th{{border-bottom:1px solid #ddd;padding:3px 6px}}
+footer{{color:#888;font-size:.8em;padding:20px 24px}}
+"""
+
+PAGES = [
+    ("index.html", "📊 Ringkasan Eksekutif"),
+    ("eksplorasi/index.html", "🔍 Eksplorasi Belanja"),
+    ("otsus.html", "🏛️ Dana Otsus"),
+    ("hibah.html", "🤝 Hibah & Bantuan"),
+    ("analisis.html", "📈 Analisis Komparatif"),
+    ("pencarian.html", "🔎 Pencarian Global"),
+]
+
+
+def slug(s):
+    return re.sub(r"[^a-z0-9]+", "-", s.lower()).strip("-")
+
+
+class Site:
+    def __init__(self, out, live_url=None, pages=PAGES):
+        self.out, self.live, self.n, self.pages = out, live_url, 0, pages
+
+    def write(self, rel, text):
+        p = os.path.join(self.out, rel)
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        with open(p, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def fig(self, cid, fig):
+        self.write(f"json/{cid}.json", fig.to_json())
+        self.n += 1
+        return fig.to_html(full_html=False, include_plotlyjs=False, div_id=cid.replace("/", "-"))
+
+    def page(self, rel, title, body):
+        up = "../" * rel.count("/")
+        nav = "".join(f'<a href="{up}{p}">{html.escape(t)}</a>' for p, t in self.pages)
+        live = f' · <a href="{html.escape(self.live)}">Versi interaktif</a>' if self.live else ""
+        self.write(rel, f"""<!doctype html><html lang="id"><head><meta charset="utf-8">
+<meta name="viewport" content="width=device-width,initial-scale=1">
+<title>{html.escape(title)} · {d.PAGE_CONFIG['page_title']}</title>
+<style>{CSS}</style><script src="{up}assets/plotly.min.js"></script></head>
+<body><nav>{nav}</nav><main>{body}</main>
+<footer>Sumber: Qanun APBA 2025 · Cakupan: Lampiran I-VII{live}</footer></body></html>""")
+
+
+def kpi(items):
+    return '<div class="kpi">' + "".join(f"<div>{html.escape(k)}<b>{html.escape(v)}</b></div>" for k, v in items) + "</div>"
+
+def table(df, money=()):
+    t = df.to_html(index=False, border=0, escape=True,
+                   formatters={c: "{:,.0f}".format for c in money}, na_rep="")
+    return f'<div class="tbl">{t}</div>'
+
+def cols(*parts):
+    return '<div class="row">' + "".join(f"<div>{p}</div>" for p in parts) + "</div>"
+
+
+# ════════════════════════════════════════════
+# HALAMAN
+# ════════════════════════════════════════════
+
+def ringkasan(s, cube):
+    k = d.agg_kpi(cube)
+    body = "<h2>📊 Ringkasan Eksekutif APBA 2025</h2>" + kpi([
+        ("💰 Pendapatan", d.rp(k["pendapatan"], True)), ("💸 Belanja", d.rp(k["belanja"], True)),
+        ("📈 Surplus/Defisit", d.rp(k["surplus"], True)), ("🏛️ Dana Otsus", d.rp(k["otsus"], True))])
+    body += cols("<h3>Komposisi Belanja</h3>" + s.fig("ringkasan/komposisi", d.fig_komposisi(cube)),
+                 "<h3>Top 15 SKPD</h3>" + s.fig("ringkasan/top_skpd", d.fig_top_skpd(cube)))
+    body += "<h3>Alokasi per Urusan Pemerintahan</h3>" + s.fig("ringkasan/urusan", d.fig_urusan(cube))
+    s.page("index.html", "Ringkasan Eksekutif", body)
+
+def eksplorasi(s, cube):
+    sk = cube[("SKPD",)]
+    li = "".join(f'<li><a href="{slug(n)}.html">{html.escape(n)}</a> — {d.rp(sk.at[n,"total"],True)}</li>'
+                 for n in sorted(sk.index))
+    s.page("eksplorasi/index.html", "Eksplorasi Belanja",
+           f"<h2>🔍 Eksplorasi Belanja per SKPD</h2><ul>{li}</ul>")
+    for sel in sorted(sk.index):
+        f = slug(sel)
+        dd = cube["skpd_rows"](sel)[["KODE_REKENING","URAIAN","JUMLAH_NUM","KAT","INDIKATOR"]]
+        dd.columns = ["Kode","Uraian","Jumlah (Rp)","Kategori","Indikator"]
+        dd = dd.sort_values("Jumlah (Rp)", ascending=False)
+        s.write(f"eksplorasi/{f}.csv", dd.to_csv(index=False))
+        body = (f"<h2>🔍 {html.escape(sel)}</h2>" +
+                kpi([("Total", d.rp(sk.at[sel,"total"], True)), ("Item", f"{sk.at[sel,'rows']:,}")]) +
+                cols("<h3>Proporsi Belanja</h3>" + s.fig(f"eksplorasi/{f}/proporsi", d.fig_proporsi(cube, sel)),
+                     "<h3>Breakdown Kategori</h3>" + s.fig(f"eksplorasi/{f}/kategori", d.fig_kategori_skpd(cube, sel))) +
+                f'<h3>📋 Rincian Belanja</h3><p><a href="{f}.csv">📥 Download CSV</a></p>' +
+                table(dd, ["Jumlah (Rp)"]))
+        s.page(f"eksplorasi/{f}.html", sel, body)
+
+def otsus(s, cube):
+    do = cube["otsus_rows"].iloc[cube["otsus_pos"]][["KODE_REKENING","URAIAN","JUMLAH_NUM"]]
+    do.columns = ["Kode","Uraian","Jumlah (Rp)"]
+    do = do.sort_values("Jumlah (Rp)", ascending=False)
+    body = ("<h2>🏛️ Dana Otonomi Khusus Aceh (Lampiran VII)</h2>" +
+            kpi([("Total Dana Otsus", d.rp(cube["kpi"]["otsus"], True))]) +
+            cols("<h3>Distribusi per Sektor</h3>" + s.fig("otsus/sektor", d.fig_otsus_sektor(cube)),
+                 "<h3>Aliran Dana Otsus</h3>" + s.fig("otsus/aliran", d.fig_otsus_aliran(cube))) +
+            "<h3>📋 Detail Otsus</h3>" + table(do, ["Jumlah (Rp)"]))
+    s.page("otsus.html", "Dana Otsus", body)
+
+def hibah(s, cube, rx):
+    h, hj, bj = cube["hibah"], cube["hibah_jenis"], cube["bantuan_jenis"]
+    th = d.agg_top_penerima(rx)
+    dh = h[["NO","NAMA_PENERIMA","ALAMAT","BESARAN_NUM","JENIS_HIBAH"]]
+    dh.columns = ["No","Penerima","Alamat","Besaran (Rp)","Jenis"]
+    dh = dh.sort_values("Besaran (Rp)", ascending=False)
+    s.write("hibah_apba_2025.csv", dh.to_csv(index=False))
+    body = ("<h2>🤝 Transparansi Hibah & Bantuan Keuangan</h2><h3>📄 Penerima Hibah (Lamp III)</h3>" +
+            kpi([("Hibah Uang", d.rp(hj.get("UANG",0), True)), ("Hibah Barang", d.rp(hj.get("BARANG",0), True)),
+                 ("Jumlah Penerima", f"{len(h):,}")]) +
+            cols("<h3>Proporsi Hibah</h3>" + s.fig("hibah/jenis", d.fig_hibah_jenis(cube)),
+                 "<h3>Top 15 Penerima</h3>" + table(th, ["Besaran (Rp)"])) +
+            '<h3>📋 Daftar Lengkap</h3><p><a href="hibah_apba_2025.csv">📥 Download CSV</a></p>' +
+            table(dh, ["Besaran (Rp)"]) +
+            "<h3>🗺️ Bantuan Keuangan (Lamp V)</h3>" +
+            kpi([("Bantuan Umum", d.rp(bj.get("UMUM",0), True)), ("Bantuan Khusus", d.rp(bj.get("KHUSUS",0), True))]) +
+            "<h3>Distribusi per Kabupaten/Kota</h3>" + s.fig("hibah/bantuan_kab", d.fig_bantuan_kab(cube)))
+    s.page("hibah.html", "Hibah & Bantuan", body)
+
+def analisis(s, cube):
+    sel = d.top10_skpd(cube)[:3]
+    body = ("<h2>📈 Analisis Komparatif</h2>" +
+            "<h3>Heatmap: Intensitas Belanja per SKPD & Jenis</h3>" + s.fig("analisis/heatmap", d.fig_heatmap(cube)) +
+            "<h3>Korelasi: Sub-Kegiatan vs Anggaran</h3>" + s.fig("analisis/korelasi", d.fig_korelasi(cube)) +
+            "<h3>Radar: Profil Belanja Top 10 SKPD</h3>" + s.fig("analisis/radar", d.fig_radar(cube, sel)))
+    s.page("analisis.html", "Analisis Komparatif", body)
+
+def pencarian(s):
+    where = f'<a href="{html.escape(s.live)}">versi interaktif</a>' if s.live else "versi interaktif (Streamlit)"
+    s.page("pencarian.html", "Pencarian Global",
+           f"<h2>🔎 Pencarian Global</h2><p>Pencarian kata kunci tersedia di {where}.</p>")
+
+
+def _publish(out, rel):
+    """Arahkan `out` (symlink) ke rilis `rel` lewat os.replace pada link, jadi
+    pembaca selalu melihat rilis lama atau baru utuh. Hanya rilis baru &
+    sebelumnya yang disimpan. Tanpa dukungan symlink (mis. Windows tanpa hak
+    admin) `out` ditukar dengan rename: ada jeda singkat saat `out` tidak ada."""
+    base, lama = os.path.basename(out), f"{out}.lama"
+    prev = os.readlink(out) if os.path.islink(out) else None
+    if os.path.lexists(f"{out}.lnk"): os.remove(f"{out}.lnk")
+    try:
+        os.symlink(os.path.basename(rel), f"{out}.lnk", target_is_directory=True)
+        if prev is None and os.path.isdir(out):    # `out` lama masih direktori biasa
+            shutil.rmtree(lama, ignore_errors=True)
+            os.replace(out, lama); prev = lama
+        os.replace(f"{out}.lnk", out)
+    except (OSError, NotImplementedError):
+        if os.path.lexists(f"{out}.lnk"): os.remove(f"{out}.lnk")
+        shutil.rmtree(lama, ignore_errors=True)
+        if os.path.islink(out): os.remove(out)
+        elif os.path.exists(out): os.replace(out, lama)
+        os.replace(rel, out); prev = lama
+    keep = {os.path.basename(rel), os.path.basename(prev or "")}
+    rilis = re.compile(re.escape(base) + r"\.(\d{8}-\d{6}-\d+|lama)")
+    parent = os.path.dirname(os.path.abspath(out))
+    for o in os.listdir(parent):
+        if rilis.fullmatch(o) and o not in keep:
+            shutil.rmtree(os.path.join(parent, o), ignore_errors=True)
+
+def build(out, live_url=None, tahun=None):
+    """Render seluruh halaman ke direktori rilis baru lalu pasang sebagai `out`
+    (lihat _publish). Semua tabel & chart diambil dari satu versi data
+    (SQLite: `tahun`)."""
+    cube = d.load_cube(tahun)
+    out = out.rstrip("/\\")
+    rel = f"{out}.{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+    tmp = rel + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    s = Site(tmp, live_url, [p for p in PAGES if p[0] != "hibah.html" or "hibah" in cube])
+    s.write("assets/plotly.min.js", get_plotlyjs())
+    ringkasan(s, cube); eksplorasi(s, cube); otsus(s, cube)
+    if "hibah" in cube: hibah(s, cube, d.build_recipients(cube))   # tidak ada di backend SQLite
+    analisis(s, cube); pencarian(s)
+    s.write("version.json", json.dumps({"data_version": cube["ver"], "charts": s.n}))
+    os.replace(tmp, rel)
+    _publish(out, rel)
+    return s.n
+
+def main():
+    ap = argparse.ArgumentParser(description="Ekspor statis dashboard APBA 2025")
+    ap.add_argument("--out", default="site")
+    ap.add_argument("--live-url", help="URL aplikasi Streamlit untuk filter interaktif")
+    ap.add_argument("--tahun", type=int, help="tahun anggaran (backend SQLite)")
+    a = ap.parse_args()
+    n = build(a.out, a.live_url, a.tahun)
+    print(f"{n} chart → {a.out}/index.html")
+
+if __name__ == "__main__":
+    main()
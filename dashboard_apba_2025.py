@@ -9,14 +9,21 @@ import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
-import io, warnings
+import io, os, re, gzip, json, time, shutil, difflib, hashlib, threading, warnings
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import apba_sqlite
 warnings.filterwarnings("ignore")
+# Copy-on-Write: frame versi data (cube, indeks) dibagi read-only antar sesi;
+# slice & seleksi kolom di halaman tidak menyalin data kecuali ditulis.
+pd.set_option("mode.copy_on_write", True)
 
 # ════════════════════════════════════════════
 # CONFIG
 # ════════════════════════════════════════════
 
-st.set_page_config(
+PAGE_CONFIG = dict(
     page_title="Transparansi APBA Aceh 2025",
     page_icon="🏛️",
     layout="wide",
@@ -45,126 +52,1328 @@ def rp(v, short=False):
         if abs(v)>=1e6:  return f"Rp {v/1e6:,.1f} Jt"
     return f"Rp {v:,.0f}"
 
+# ════════════════════════════════════════════
+# INSTRUMENTASI
+# ════════════════════════════════════════════
+# phase() mencatat waktu, jumlah baris & selisih RSS per fase rerun aktif
+# (no-op di luar main(), mis. dari apba_api/apba_bench). Ringkasan tiap rerun
+# tampil di sidebar (?debug=1) dan ditambahkan ke APBA_PERF_LOG:
+# *.prom → textfile Prometheus, selain itu JSONL. Penghitung disimpan di
+# perf_history() (cache_resource) karena skrip dieksekusi ulang tiap rerun.
+
+PERF_LOG = os.environ.get("APBA_PERF_LOG")
+PERF_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+_run = threading.local()
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return 0.0
+
+@contextmanager
+def phase(name, rows=None):
+    """Catat satu fase; entri yang di-yield boleh diisi (mis. rows) oleh pemanggil."""
+    rec = getattr(_run, "rec", None)
+    if rec is None:
+        yield {}; return
+    e = {"phase": name, "depth": rec["depth"], "rows": rows}
+    rec["phases"].append(e); rec["depth"] += 1
+    t, m = time.perf_counter(), _rss_mb()
+    try:
+        yield e
+    finally:
+        rec["depth"] -= 1
+        e["ms"] = round((time.perf_counter() - t) * 1e3, 2)
+        e["mem_mb"] = round(_rss_mb() - m, 1)
+
+@st.cache_resource
+def perf_history():
+    return {"runs": deque(maxlen=1000), "lock": threading.Lock(), "hist": {}, "phase_s": {},
+            "loads": {"load_data": {"calls": 0, "miss": 0, "builds": 0}}}
+
+def perf_begin(page):
+    _run.rec = {"ts": time.time(), "page": page, "depth": 0, "phases": [], "t0": time.perf_counter()}
+
+def perf_end():
+    rec = _run.__dict__.pop("rec", None)
+    if rec is None: return None
+    rec["total_ms"] = round((time.perf_counter() - rec.pop("t0")) * 1e3, 2)
+    rec["rss_mb"] = round(_rss_mb(), 1); del rec["depth"]
+    ph = perf_history()
+    with ph["lock"]:
+        ph["runs"].append(rec)
+        h = ph["hist"].setdefault(rec["page"], [0] * (len(PERF_BUCKETS) + 1) + [0.0])
+        h[next((i for i, b in enumerate(PERF_BUCKETS) if rec["total_ms"] / 1e3 <= b), len(PERF_BUCKETS))] += 1
+        h[-1] += rec["total_ms"] / 1e3
+        for e in rec["phases"]:
+            if e["depth"] == 0:
+                ph["phase_s"][e["phase"]] = ph["phase_s"].get(e["phase"], 0.0) + e["ms"] / 1e3
+        if PERF_LOG:
+            try: _perf_export(rec, ph)
+            except OSError: pass
+    return rec
+
+def _perf_export(rec, ph):
+    if not PERF_LOG.endswith(".prom"):
+        with open(PERF_LOG, "a") as fh: fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        return
+    L = ["# TYPE apba_render_seconds histogram"]
+    for page, h in ph["hist"].items():
+        c = 0
+        for b, n in zip([*map(str, PERF_BUCKETS), "+Inf"], h[:-1]):
+            c += n; L.append(f'apba_render_seconds_bucket{{page="{page}",le="{b}"}} {c}')
+        L += [f'apba_render_seconds_sum{{page="{page}"}} {h[-1]:.4f}', f'apba_render_seconds_count{{page="{page}"}} {c}']
+    L.append("# TYPE apba_phase_seconds_total counter")
+    L += [f'apba_phase_seconds_total{{phase="{k}"}} {v:.4f}' for k, v in ph["phase_s"].items()]
+    L.append("# TYPE apba_cache_requests_total counter")
+    for k, v in ph["loads"].items():
+        L += [f'apba_cache_requests_total{{cache="{k}",result="hit"}} {v["calls"] - v["miss"]}',
+              f'apba_cache_requests_total{{cache="{k}",result="miss"}} {v["miss"]}']
+    fs = fig_cache_stats()
+    L += [f'apba_cache_requests_total{{cache="figure",result="hit"}} {fs["hit"]}',
+          f'apba_cache_requests_total{{cache="figure",result="miss"}} {fs["miss"]}',
+          "# TYPE apba_rss_megabytes gauge", f"apba_rss_megabytes {rec['rss_mb']}"]
+    tmp = f"{PERF_LOG}.tmp{os.getpid()}"
+    with open(tmp, "w") as fh: fh.write("\n".join(L) + "\n")
+    os.replace(tmp, PERF_LOG)
+
+def perf_summary():
+    """p50/p95 waktu render per halaman dari riwayat rerun proses ini."""
+    ph = perf_history()
+    with ph["lock"]: runs = list(ph["runs"])
+    if not runs: return pd.DataFrame(columns=["Halaman","Rerun","p50 ms","p95 ms"])
+    df = pd.DataFrame({"Halaman": [r["page"] for r in runs], "ms": [r["total_ms"] for r in runs]})
+    g = df.groupby("Halaman")["ms"]
+    return pd.DataFrame({"Rerun": g.size(), "p50 ms": g.quantile(.5), "p95 ms": g.quantile(.95)}).reset_index()
+
+def perf_panel(box, rec):
+    if rec is None: return
+    with box.container():
+        st.caption(f"Rerun ini: **{rec['total_ms']:,.0f} ms** · RSS {rec['rss_mb']:,.0f} MB")
+        st.dataframe(pd.DataFrame([{"Fase": "\u2003" * e["depth"] + e["phase"], "ms": e["ms"],
+                                    "Baris": e["rows"], "Δ MB": e["mem_mb"], "Cache": e.get("cache", "")}
+                                   for e in rec["phases"]]),
+                     hide_index=True, use_container_width=True)
+        ld, fs = perf_history()["loads"]["load_data"], fig_cache_stats()
+        st.caption(f"load_data hit {1 - ld['miss'] / max(ld['calls'], 1):.0%} ({ld['calls']} panggilan) · "
+                   f"figure hit {fs['hit_rate']:.0%} ({fs['entries']} entri, {fs['mb']:.1f} MB)")
+        st.dataframe(perf_summary().style.format(precision=0), hide_index=True, use_container_width=True)
+
 # ════════════════════════════════════════════
 # DATA LOADING
 # ════════════════════════════════════════════
 
-@st.cache_data
-def load_data():
-    lamp2 = pd.read_csv("02_lampiran2_rincian_apbd_2025.csv", dtype=str)
-    lamp3 = pd.read_csv("03_lampiran3_hibah_2025.csv", dtype=str)
-    lamp5 = pd.read_csv("04_lampiran5_bantuan_keuangan_2025.csv", dtype=str)
-    lamp7 = pd.read_csv("05_lampiran7_dana_otsus_2025.csv", dtype=str)
-
-    for df in [lamp2, lamp3, lamp5, lamp7]:
-        if "HALAMAN" in df.columns:
-            df["HAL_NUM"] = pd.to_numeric(df["HALAMAN"], errors="coerce")
-        if "JUMLAH_RP" in df.columns:
-            df["JUMLAH_NUM"] = pd.to_numeric(df["JUMLAH_RP"], errors="coerce")
-        if "LEVEL" in df.columns:
-            df["LEVEL_NUM"] = pd.to_numeric(df["LEVEL"], errors="coerce")
-        if "BESARAN_RP" in df.columns:
-            df["BESARAN_NUM"] = pd.to_numeric(df["BESARAN_RP"], errors="coerce")
-
-    # ── SKPD Mapping ──
-    S = [
-        ("Dinas Pendidikan","DINAS","1.01",55,82),
-        ("Bappeda","BADAN","4.01",83,99),
-        ("Dinas Pendidikan Dayah","DINAS","1.01",100,204),
-        ("Dinas Kesehatan","DINAS","1.02",205,215),
-        ("Satpol PP & WH","SATPOL","1.05",216,250),
-        ("Dinas Sosial","DINAS","1.06",251,280),
-        ("Dinas Pemberdayaan Perempuan & PA","DINAS","2.08",281,370),
-        ("Dinas Pangan","DINAS","2.09",371,400),
-        ("Dinas Kominfo & Persandian","DINAS","2.16",401,462),
-        ("Dinas PUPR","DINAS","1.03",463,473),
-        ("DPMPTSP","DINAS","2.18",474,520),
-        ("Dinas Kebudayaan & Pariwisata","DINAS","2.22",521,555),
-        ("Dinas Perpustakaan & Kearsipan","DINAS","2.23",556,600),
-        ("Dinas Tenaga Kerja","DINAS","2.07",601,630),
-        ("Dinas LHK","DINAS","2.11",631,656),
-        ("RSUD dr. Zainoel Abidin","RSUD","1.02",657,669),
-        ("Dinas Pemberdayaan Masyarakat & Gampong","DINAS","2.13",670,700),
-        ("Dinas Syariat Islam","DINAS","9.01",701,730),
-        ("Dinas Pertanian & Perkebunan","DINAS","3.27",731,760),
-        ("Dinas Peternakan","DINAS","3.27",761,780),
-        ("Dinas Koperasi & UKM","DINAS","2.17",781,800),
-        ("BPKA","BADAN","4.02",801,812),
-        ("Dinas Perumahan & Permukiman","DINAS","1.04",813,823),
-        ("BKD","BADAN","5.01",824,860),
-        ("BPSDM","BADAN","5.02",861,900),
-        ("Inspektorat Aceh","INSPEKTORAT","6.01",901,920),
-        ("Sekretariat MPU","SEKRETARIAT","9.01",921,950),
-        ("Sekretariat MAA","SEKRETARIAT","9.01",951,970),
-        ("Sekretariat MPA","SEKRETARIAT","9.01",971,980),
-        ("Sekretariat BRA","SEKRETARIAT","9.01",981,987),
-        ("Sekretariat Daerah Aceh","SETDA","7.01",26,54),
-        ("Dinas Kelautan & Perikanan","DINAS","3.25",988,1000),
-        ("Dinas Perindustrian & Perdagangan","DINAS","3.30",1001,1020),
-        ("Dinas Pemuda & Olahraga","DINAS","2.19",1021,1040),
-        ("Dinas Perhubungan","DINAS","2.15",1041,1055),
-        ("Badan Kesbangpol","BADAN","9.01",1056,1062),
-    ]
-    skpd_df = pd.DataFrame(S, columns=["nama_skpd","tipe","kode_urusan","h_awal","h_akhir"])
-
-    # Map halaman → SKPD
-    ranges = list(zip(skpd_df["h_awal"], skpd_df["h_akhir"], skpd_df["nama_skpd"]))
-    def m(h):
-        if pd.isna(h): return "N/A"
-        for a, b, n in ranges:
-            if a <= h <= b: return n
-        return "N/A"
-    lamp2["SKPD"] = lamp2["HAL_NUM"].apply(m)
-
-    # Kategori belanja
-    def kb(k):
-        if not isinstance(k, str): return "Lainnya"
-        if k.startswith("5.1.01"): return "Belanja Pegawai"
-        if k.startswith("5.1.02"): return "Belanja Barang dan Jasa"
-        if k.startswith("5.1.03"): return "Belanja Subsidi"
-        if k.startswith("5.1.05"): return "Belanja Hibah"
-        if k.startswith("5.1.06"): return "Belanja Bantuan Sosial"
-        if k.startswith("5.2"):    return "Belanja Modal"
-        if k.startswith("5.3"):    return "Belanja Tidak Terduga"
-        if k.startswith("5.4"):    return "Belanja Transfer"
-        if k.startswith("5."):     return "Belanja Lainnya"
-        if k.startswith("4."):     return "Pendapatan"
-        if k.startswith("6."):     return "Pembiayaan"
-        return "Lainnya"
-    lamp2["KAT"] = lamp2["KODE_REKENING"].apply(kb)
-
-    # Urusan map
-    UM = {
-        "1.01":"Pendidikan","1.02":"Kesehatan","1.03":"Pekerjaan Umum",
-        "1.04":"Perumahan","1.05":"Trantibum","1.06":"Sosial",
-        "2.07":"Tenaga Kerja","2.08":"Pemberdayaan Perempuan","2.09":"Pangan",
-        "2.11":"Lingkungan Hidup","2.13":"Pemberdayaan Masyarakat",
-        "2.15":"Perhubungan","2.16":"Komunikasi & Informatika",
-        "2.17":"Koperasi & UKM","2.18":"Penanaman Modal",
-        "2.19":"Pemuda & Olahraga","2.22":"Kebudayaan","2.23":"Perpustakaan",
-        "3.25":"Kelautan & Perikanan","3.27":"Pertanian",
-        "3.30":"Perdagangan","4.01":"Perencanaan","4.02":"Keuangan",
-        "5.01":"Kepegawaian","5.02":"Pengembangan SDM",
-        "6.01":"Pengawasan","7.01":"Pemerintahan Umum",
-        "9.01":"Keistimewaan Aceh",
-    }
+SRC = {
+    "lamp2":"02_lampiran2_rincian_apbd_2025.csv",
+    "lamp3":"03_lampiran3_hibah_2025.csv",
+    "lamp5":"04_lampiran5_bantuan_keuangan_2025.csv",
+    "lamp7":"05_lampiran7_dana_otsus_2025.csv",
+}
+
+# ── Skema kolom: kolom CSV → (kolom hasil, dtype) ──
+# "rp"   = rupiah, di-parse sekali ke float64 (sumber memuat pecahan sen)
+# "lazy" = teks panjang, tidak ikut load_data(); dimuat lewat load_text() saat
+#          pertama dipakai (cube belanja/hibah, indeks cari, laporan memori)
+# Kolom CSV di luar skema tidak dibaca.
+SCHEMA = {
+    "lamp2": {"KODE_REKENING":("KODE_REKENING","str"), "URAIAN":("URAIAN","str"),
+              "INDIKATOR":("INDIKATOR","lazy"), "LEVEL":("LEVEL_NUM","Int16"),
+              "HALAMAN":("HAL_NUM","Int16"), "JUMLAH_RP":("JUMLAH_NUM","rp")},
+    "lamp3": {"NO":("NO","str"), "NAMA_PENERIMA":("NAMA_PENERIMA","str"),
+              "ALAMAT":("ALAMAT","lazy"), "JENIS_HIBAH":("JENIS_HIBAH","category"),
+              "HALAMAN":("HAL_NUM","Int16"), "BESARAN_RP":("BESARAN_NUM","rp")},
+    "lamp5": {"NO":("NO","str"), "NAMA_PENERIMA":("NAMA_PENERIMA","category"),
+              "JENIS":("JENIS","category"), "HALAMAN":("HAL_NUM","Int16"),
+              "BESARAN_RP":("BESARAN_NUM","rp")},
+    "lamp7": {"KODE_REKENING":("KODE_REKENING","str"), "URAIAN":("URAIAN","str"),
+              "HALAMAN":("HAL_NUM","Int16"), "JUMLAH_RP":("JUMLAH_NUM","rp")},
+}
+LAZY = {n: [c for c, (_, t) in sc.items() if t == "lazy"] for n, sc in SCHEMA.items()}
+
+# ── SKPD Mapping: (nama, tipe, kode_urusan, halaman awal, halaman akhir) ──
+SM = [
+    ("Dinas Pendidikan","DINAS","1.01",55,82),
+    ("Bappeda","BADAN","4.01",83,99),
+    ("Dinas Pendidikan Dayah","DINAS","1.01",100,204),
+    ("Dinas Kesehatan","DINAS","1.02",205,215),
+    ("Satpol PP & WH","SATPOL","1.05",216,250),
+    ("Dinas Sosial","DINAS","1.06",251,280),
+    ("Dinas Pemberdayaan Perempuan & PA","DINAS","2.08",281,370),
+    ("Dinas Pangan","DINAS","2.09",371,400),
+    ("Dinas Kominfo & Persandian","DINAS","2.16",401,462),
+    ("Dinas PUPR","DINAS","1.03",463,473),
+    ("DPMPTSP","DINAS","2.18",474,520),
+    ("Dinas Kebudayaan & Pariwisata","DINAS","2.22",521,555),
+    ("Dinas Perpustakaan & Kearsipan","DINAS","2.23",556,600),
+    ("Dinas Tenaga Kerja","DINAS","2.07",601,630),
+    ("Dinas LHK","DINAS","2.11",631,656),
+    ("RSUD dr. Zainoel Abidin","RSUD","1.02",657,669),
+    ("Dinas Pemberdayaan Masyarakat & Gampong","DINAS","2.13",670,700),
+    ("Dinas Syariat Islam","DINAS","9.01",701,730),
+    ("Dinas Pertanian & Perkebunan","DINAS","3.27",731,760),
+    ("Dinas Peternakan","DINAS","3.27",761,780),
+    ("Dinas Koperasi & UKM","DINAS","2.17",781,800),
+    ("BPKA","BADAN","4.02",801,812),
+    ("Dinas Perumahan & Permukiman","DINAS","1.04",813,823),
+    ("BKD","BADAN","5.01",824,860),
+    ("BPSDM","BADAN","5.02",861,900),
+    ("Inspektorat Aceh","INSPEKTORAT","6.01",901,920),
+    ("Sekretariat MPU","SEKRETARIAT","9.01",921,950),
+    ("Sekretariat MAA","SEKRETARIAT","9.01",951,970),
+    ("Sekretariat MPA","SEKRETARIAT","9.01",971,980),
+    ("Sekretariat BRA","SEKRETARIAT","9.01",981,987),
+    ("Sekretariat Daerah Aceh","SETDA","7.01",26,54),
+    ("Dinas Kelautan & Perikanan","DINAS","3.25",988,1000),
+    ("Dinas Perindustrian & Perdagangan","DINAS","3.30",1001,1020),
+    ("Dinas Pemuda & Olahraga","DINAS","2.19",1021,1040),
+    ("Dinas Perhubungan","DINAS","2.15",1041,1055),
+    ("Badan Kesbangpol","BADAN","9.01",1056,1062),
+]
+
+# ── Urusan Map ──
+UM = {
+    "1.01":"Pendidikan","1.02":"Kesehatan","1.03":"Pekerjaan Umum",
+    "1.04":"Perumahan","1.05":"Trantibum","1.06":"Sosial",
+    "2.07":"Tenaga Kerja","2.08":"Pemberdayaan Perempuan","2.09":"Pangan",
+    "2.11":"Lingkungan Hidup","2.13":"Pemberdayaan Masyarakat",
+    "2.15":"Perhubungan","2.16":"Komunikasi & Informatika",
+    "2.17":"Koperasi & UKM","2.18":"Penanaman Modal",
+    "2.19":"Pemuda & Olahraga","2.22":"Kebudayaan","2.23":"Perpustakaan",
+    "3.25":"Kelautan & Perikanan","3.27":"Pertanian",
+    "3.30":"Perdagangan","4.01":"Perencanaan","4.02":"Keuangan",
+    "5.01":"Kepegawaian","5.02":"Pengembangan SDM",
+    "6.01":"Pengawasan","7.01":"Pemerintahan Umum",
+    "9.01":"Keistimewaan Aceh",
+}
+
+# ── Kategori belanja: prefix kode rekening → kategori (prefix terpanjang menang) ──
+KB = {
+    "5.1.01":"Belanja Pegawai","5.1.02":"Belanja Barang dan Jasa",
+    "5.1.03":"Belanja Subsidi","5.1.05":"Belanja Hibah",
+    "5.1.06":"Belanja Bantuan Sosial","5.2":"Belanja Modal",
+    "5.3":"Belanja Tidak Terduga","5.4":"Belanja Transfer",
+    "5.":"Belanja Lainnya","4.":"Pendapatan","6.":"Pembiayaan",
+}
+
+# ── Sektor otsus: kode urusan (Lampiran VII) → sektor ──
+UN = {"1.01":"Pendidikan","1.02":"Kesehatan","1.03":"Pekerjaan Umum",
+      "1.04":"Perumahan","1.06":"Sosial","2.09":"Pangan","2.11":"LH & Kehutanan",
+      "2.13":"Pemberdayaan Masyarakat","2.16":"Komunikasi","2.22":"Kebudayaan",
+      "3.25":"Kelautan","3.27":"Pertanian","9.01":"Keistimewaan Aceh"}
+
+
+# ════════════════════════════════════════════
+# KLASIFIKASI
+# ════════════════════════════════════════════
+
+def page_index(ranges):
+    """Interval index halaman → SKPD dari [(nama, ..., h_awal, h_akhir)].
+    Mengembalikan (awal, akhir, nama, masalah) terurut per h_awal;
+    `masalah` berisi rentang yang tumpang tindih atau celah antar rentang."""
+    r = sorted((a, b, n) for n, *_, a, b in ranges)
+    lo = np.array([x[0] for x in r]); hi = np.array([x[1] for x in r])
+    names = [x[2] for x in r]
+    issues = [f"{n}: h_awal {a} > h_akhir {b}" for a, b, n in r if a > b]
+    for i in range(1, len(r)):
+        if lo[i] <= hi[i-1]:
+            issues.append(f"Tumpang tindih: {names[i-1]} ({lo[i-1]}-{hi[i-1]}) & {names[i]} ({lo[i]}-{hi[i]})")
+        elif lo[i] > hi[i-1] + 1:
+            issues.append(f"Celah halaman {hi[i-1]+1}-{lo[i]-1} tanpa SKPD")
+    return lo, hi, names, issues
+
+# Kategori Categorical diurutkan alfabetis agar urutan hasil groupby sama
+# dengan kolom object sebelumnya.
+
+def classify_pages(hal, idx, default="N/A"):
+    lo, hi, names, _ = idx
+    h = pd.to_numeric(hal, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    i = np.searchsorted(lo, h, side="right") - 1
+    ok = (i >= 0) & (h <= hi[np.clip(i, 0, None)])
+    cats = sorted({*names, default})
+    pos = np.array([cats.index(n) for n in [*names, default]])
+    return pd.Categorical.from_codes(pos[np.where(ok, i, len(names))], cats)
+
+def classify_prefix(kode, table, default, boundary=False):
+    """Longest-prefix lookup kode → label sebagai Categorical. Lookup dilakukan
+    sekali per kode unik, per panjang prefix. `boundary=True` mensyaratkan
+    prefix berakhir di batas segmen ("1.01" cocok "1.01.02", bukan "1.010")."""
+    codes, uq = pd.factorize(pd.Series(kode, dtype=object))
+    uq = pd.Series(uq, dtype=object)
+    lab = np.full(len(uq), default, dtype=object)
+    done = np.zeros(len(uq), bool)
+    for L in sorted({len(k) for k in table}, reverse=True):
+        hit = uq.str[:L].map({k: v for k, v in table.items() if len(k) == L})
+        ok = hit.notna().to_numpy() & ~done
+        if boundary: ok &= uq.str[L:L+1].isin(["", "."]).to_numpy()
+        lab[ok] = hit[ok]; done |= ok
+    cats = sorted({*table.values(), default})
+    lc = pd.Categorical(lab, categories=cats).codes
+    return pd.Categorical.from_codes(np.append(lc, cats.index(default))[codes], cats)
+
+PAGE_IDX = page_index(SM)
+
+
+def read_typed(name):
+    sc = SCHEMA[name]
+    return _typed(pd.read_csv(SRC[name], dtype=str, usecols=lambda c: c in sc), sc)
+
+def read_chunks(name, chunksize, src="."):
+    """read_typed per chunk (ingest streaming, lihat apba_sqlite.ingest_lampiran)."""
+    sc = SCHEMA[name]
+    for ch in pd.read_csv(os.path.join(src, SRC[name]), dtype=str, usecols=lambda c: c in sc, chunksize=chunksize):
+        yield _typed(ch, sc)
+
+def _typed(df, sc):
+    for c in list(df.columns):
+        out, t = sc[c]
+        if t == "rp":
+            df[out] = pd.to_numeric(df.pop(c), errors="coerce")
+        elif t.startswith("Int"):
+            df[out] = pd.to_numeric(df.pop(c), errors="coerce").round().astype(t)
+        elif t in ("category", "lazy"):
+            df[c] = df[c].astype("category")
+    return df
+
+def classify_lamp2(df):
+    df["SKPD"] = classify_pages(df["HAL_NUM"], PAGE_IDX)
+    df["KAT"] = classify_prefix(df["KODE_REKENING"], KB, "Lainnya")
+    return df
+
+def classify_otsus(lamp7):
+    """Baris program otsus (kode x.yy.zz) → sektor; mengembalikan (baris, sektor)."""
+    l7p = lamp7[lamp7["KODE_REKENING"].str.match(r"^\d+\.\d+\.\d+$",na=False)]
+    return l7p, classify_prefix(l7p["KODE_REKENING"], UN, "Lainnya", boundary=True)
+
+# ── Pemuatan paralel: tiap lampiran di-parse & diklasifikasi di thread sendiri ──
+# (parser CSV pandas melepas GIL), sehingga cold start ≈ file terbesar, bukan
+# jumlah semua file. APBA_LOAD_WORKERS=1 = jalur serial; hasil keduanya identik.
+LOAD_WORKERS = int(os.environ.get("APBA_LOAD_WORKERS", min(len(SRC), os.cpu_count() or 1)))
+
+def _load_one(name):
+    df = read_typed(name)
+    text = {(name, c): df.pop(c) for c in LAZY[name] if c in df}
+    if name == "lamp2": classify_lamp2(df)
+    return df, text
+
+def _build_data(workers=None, reuse=None):
+    """Parse & klasifikasi semua lampiran; `reuse` = {nama: (frame, teks)}
+    lampiran yang tidak perlu di-parse ulang (hot reload)."""
+    reuse = reuse or {}
+    todo = [n for n in SRC if n not in reuse]
+    w = min(LOAD_WORKERS if workers is None else workers, len(todo))
+    if w > 1:
+        with ThreadPoolExecutor(w, thread_name_prefix="apba-load") as ex:
+            parts = dict(zip(todo, ex.map(_load_one, todo)))
+    else:
+        parts = {n: _load_one(n) for n in todo}
+    parts.update(reuse)
+    (lamp2, t2), (lamp3, t3), (lamp5, t5), (lamp7, t7) = (parts[n] for n in SRC)
+    text = {**t2, **t3, **t5, **t7}
+
+    skpd_df = pd.DataFrame(SM, columns=["nama_skpd","tipe","kode_urusan","h_awal","h_akhir"])
+
     skpd_df["urusan"] = skpd_df["kode_urusan"].map(UM).fillna("Lainnya")
     urusan_inv = dict(zip(skpd_df["nama_skpd"], skpd_df["urusan"]))
 
-    return lamp2, lamp3, lamp5, lamp7, skpd_df, urusan_inv
+    return (lamp2, lamp3, lamp5, lamp7, skpd_df, urusan_inv), text
+
+
+# ── Snapshot kolumnar (.npz per frame) ──
+# Hasil load_data() disimpan ke CACHE_DIR/<versi>/ agar cold start tidak
+# perlu parse CSV & derivasi ulang. Versi = hash isi CSV + tabel mapping;
+# naikkan SNAP_V bila logika derivasi berubah.
+
+CACHE_DIR = os.environ.get("APBA_CACHE_DIR", ".apba_cache")
+BACKEND = os.environ.get("APBA_BACKEND", "csv")   # "sqlite": lihat apba_sqlite.py
+SNAP_V = 3
+SNAP_GRACE_S = float(os.environ.get("APBA_SNAP_GRACE_S", 24 * 3600))   # versi lama tetap disimpan selama ini
+FRAMES = ["lamp2","lamp3","lamp5","lamp7","skpd_df"]
+
+def _file_hash(f):
+    h = hashlib.sha256()
+    with open(f, "rb") as fh:
+        for blk in iter(lambda: fh.read(1<<20), b""): h.update(blk)
+    return h.hexdigest()
+
+def _ver_key(hashes):
+    h = hashlib.sha256(f"v{SNAP_V}|{SM!r}|{UM!r}|{KB!r}|{SCHEMA!r}".encode())
+    for n in SRC: h.update(hashes[n].encode())
+    return h.hexdigest()[:16]
+
+def data_version():
+    """Versi data di disk saat ini (hash konfigurasi + hash isi tiap lampiran)."""
+    return _ver_key({n: _file_hash(f) for n, f in SRC.items()})
+
+def _pack(df):
+    arrs, cols = {}, []
+    for i, (c, s) in enumerate(df.items()):
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            arrs[f"c{i}"] = s.cat.codes.to_numpy()
+            arrs[f"k{i}"] = np.asarray(s.cat.categories, dtype=str)
+            cols.append([c, "cat"])
+        elif isinstance(s.dtype, pd.api.extensions.ExtensionDtype) and s.dtype.kind in "iu":
+            arrs[f"c{i}"] = s.to_numpy(s.dtype.numpy_dtype, na_value=0)
+            arrs[f"m{i}"] = s.isna().to_numpy()
+            cols.append([c, "nint"])
+        elif s.dtype.kind in "biuf":
+            arrs[f"c{i}"] = s.to_numpy()
+            cols.append([c, "num"])
+        else:
+            codes, uq = pd.factorize(s)
+            arrs[f"c{i}"] = codes.astype(np.int32)
+            arrs[f"k{i}"] = np.asarray(uq, dtype=str)
+            cols.append([c, "str"])
+    return arrs, cols
+
+def _unpack(z, cols):
+    out = {}
+    for i, (c, kind) in enumerate(cols):
+        v = z[f"c{i}"]
+        if kind == "num":
+            out[c] = v
+        elif kind == "nint":
+            out[c] = pd.arrays.IntegerArray(v, z[f"m{i}"])
+        elif kind == "cat":
+            out[c] = pd.Categorical.from_codes(v, z[f"k{i}"].astype(object))
+        else:
+            out[c] = np.append(z[f"k{i}"].astype(object), np.nan)[v]   # kode -1 → NaN
+    return pd.DataFrame(out)
+
+def _snap_save(key, out, text):
+    d = os.path.join(CACHE_DIR, key)
+    if os.path.isdir(d): return
+    tmp = f"{d}.tmp{os.getpid()}"
+    try:
+        os.makedirs(tmp, exist_ok=True)
+        meta = {"cols":{}, "urusan_inv":out[-1]}
+        for name, df in zip(FRAMES, out[:-1]):
+            arrs, meta["cols"][name] = _pack(df)
+            np.savez(os.path.join(tmp, f"{name}.npz"), **arrs)
+        for (name, c), v in text.items():
+            arrs, meta["cols"][f"{name}.{c}"] = _pack(v.to_frame())
+            np.savez(os.path.join(tmp, f"{name}.{c}.npz"), **arrs)
+        with open(os.path.join(tmp, "meta.json"), "w") as fh: json.dump(meta, fh)
+        os.replace(tmp, d)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        return
+    _snap_prune(key)
+
+def _snap_prune(key):
+    """Hapus snapshot versi lain yang selesai ditulis (ada meta.json) dan tidak
+    dimuat selama SNAP_GRACE_S. Direktori .tmp* milik proses lain tidak disentuh."""
+    batas = time.time() - SNAP_GRACE_S
+    for o in os.listdir(CACHE_DIR):
+        p = os.path.join(CACHE_DIR, o)
+        try:
+            if o == key or ".tmp" in o or os.stat(os.path.join(p, "meta.json")).st_mtime > batas:
+                continue
+        except OSError:
+            continue
+        shutil.rmtree(p, ignore_errors=True)
+
+def _snap_touch(d):
+    # mtime meta.json = terakhir dimuat proses mana pun (lihat _snap_prune)
+    try: os.utime(os.path.join(d, "meta.json"))
+    except OSError: pass
+
+def _snap_load(key):
+    d = os.path.join(CACHE_DIR, key)
+    try:
+        with open(os.path.join(d, "meta.json")) as fh: meta = json.load(fh)
+        _snap_touch(d)
+        fr = []
+        for name in FRAMES:
+            with np.load(os.path.join(d, f"{name}.npz"), allow_pickle=False) as z:
+                fr.append(_unpack(z, meta["cols"][name]))
+        return (*fr, meta["urusan_inv"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+@st.cache_resource(max_entries=8)
+def load_text(name, col, ver=None):
+    """Kolom teks "lazy" (mis. INDIKATOR, ALAMAT) sebagai Series kategori,
+    dibagi antar sesi. Sumber: snapshot bila ada, jika tidak baca kolom CSV."""
+    d = os.path.join(CACHE_DIR, ver or data_version())
+    try:
+        with open(os.path.join(d, "meta.json")) as fh: cols = json.load(fh)["cols"][f"{name}.{col}"]
+        _snap_touch(d)
+        with np.load(os.path.join(d, f"{name}.{col}.npz"), allow_pickle=False) as z:
+            return _unpack(z, cols)[col]
+    except (OSError, KeyError, ValueError):
+        return read_typed(name)[col]
+
+
+# ── Versi data & hot reload ──
+# Satu versi aktif per proses (data_versions()). Tiap rerun memanggil
+# current_version() sekali lalu meneruskan versi itu ke semua load_*, jadi
+# satu rerun selalu konsisten walau versi ditukar di tengah jalan; sesi lain
+# pindah ke versi baru pada rerun berikutnya. Berkas dicek via stat (mtime,
+# ukuran) paling sering tiap RELOAD_CHECK_S detik, dan isi hanya di-hash
+# untuk berkas yang stat-nya berubah. Reload dikerjakan satu thread (lock
+# non-blocking): rerun lain tetap melayani versi lama selama reload berjalan.
+# Hanya lampiran yang isinya berubah yang di-parse ulang; bagian cube per
+# lampiran dan turunan lazy (DEPS) dipakai ulang bila sumbernya tidak berubah.
+
+RELOAD_CHECK_S = float(os.environ.get("APBA_RELOAD_CHECK_S", 2))
+STABLE_TRIES, STABLE_WAIT_S = 10, 0.5     # cold start: CSV yang sedang ditulis ditunggu, dibatasi
+DEPS = {"search.lamp2": {"lamp2"}, "search.hibah": {"lamp3"}, "tree": {"lamp2"}, "rx": {"lamp3","lamp5"},
+        "memori": set(SRC)}
+
+@st.cache_resource
+def data_versions():
+    return {"lock": threading.Lock(), "cur": None, "stat": {}, "t": 0.0, "reloads": 0, "error": None}
+
+def _stat():
+    return {n: (s.st_mtime_ns, s.st_size) for n, s in zip(SRC, map(os.stat, SRC.values()))}
+
+def _build_version(hashes, prev=None):
+    """Versi baru dari hash isi per lampiran. Lampiran yang hash-nya sama
+    dengan `prev` tidak di-parse ulang dan turunannya dipakai ulang."""
+    perf_history()["loads"]["load_data"]["builds"] += 1
+    ver = _ver_key(hashes)
+    changed = [n for n in SRC if prev is None or prev["hash"][n] != hashes[n]]
+    with phase("snapshot_load") as p:
+        out = _snap_load(ver)
+        p["rows"] = out and len(out[0])
+    if out is None:
+        reuse = {} if prev is None else {
+            n: (f, {(n, c): load_text(n, c, prev["ver"]) for c in LAZY[n]})
+            for n, f in zip(FRAMES, prev["data"]) if n in SRC and n not in changed}
+        with phase(f"build_data (CSV: {', '.join(changed)})") as p:
+            out, text = _build_data(reuse=reuse)
+            p["rows"] = len(out[0])
+        _snap_save(ver, out, text)
+    v = {"ver": ver, "hash": hashes, "data": out, "changed": changed, "lock": threading.RLock(),
+         "art": {} if prev is None else {k: a for k, a in prev["art"].items() if not DEPS[k] & {*changed}}}
+    with phase("build_cube"):
+        v["cube"] = build_cube(*out, ver=ver, reuse=None if prev is None else
+                               {n: p for n, p in prev["cube"]["parts"].items() if n not in changed})
+    v["cube"]["ver"] = ver
+    return v
+
+def current_version():
+    """Versi data aktif; memicu reload inkremental bila berkas sumber berubah."""
+    vs = data_versions()
+    cur, now = vs["cur"], time.monotonic()
+    if cur is not None and now - vs["t"] < RELOAD_CHECK_S: return cur
+    try:
+        stat = _stat()
+    except OSError:              # berkas sedang diganti; cek lagi nanti
+        if cur is None: raise
+        return cur
+    vs["t"] = now
+    if stat == vs["stat"]: return cur
+    # cold start: semua menunggu satu pembangun; reload: yang lain tidak menunggu
+    if not vs["lock"].acquire(blocking=cur is None): return cur
+    try:
+        cur = vs["cur"]
+        if stat == vs["stat"]: return cur
+        old = vs["stat"]
+        for _ in range(STABLE_TRIES):
+            try:
+                hashes = {n: cur["hash"][n] if cur and stat[n] == old.get(n) else _file_hash(f)
+                          for n, f in SRC.items()}
+                st2 = _stat()
+            except OSError:                            # berkas sedang diganti
+                st2 = None
+            if st2 == stat: break
+            if cur is not None: return cur             # masih ditulis: reload dicoba lagi nanti
+            if st2 is not None: stat = st2             # cold start: tunggu sampai stat stabil
+            time.sleep(STABLE_WAIT_S)
+        else:
+            raise RuntimeError(f"CSV sumber terus berubah selama {STABLE_TRIES} kali dibaca; "
+                               "coba lagi setelah penulisan selesai.")
+        if not cur or hashes != cur["hash"]:           # bukan sekadar mtime berubah
+            try:
+                vs["cur"], vs["error"] = _build_version(hashes, cur), None
+                vs["reloads"] += cur is not None
+            except Exception as e:
+                if cur is None: raise
+                vs["error"] = f"{type(e).__name__}: {e}"   # versi lama tetap dipakai
+        vs["stat"] = stat
+        return vs["cur"]
+    finally:
+        vs["lock"].release()
+
+def _artefak(v, key, build):
+    """Turunan lazy per versi (DEPS); dibangun sekali, rerun lain menunggu."""
+    a = v["art"].get(key)
+    if a is None:
+        with v["lock"]:
+            a = v["art"].get(key)
+            if a is None: a = v["art"][key] = build()
+    return a
+
+def load_data(v=None):
+    return (v or current_version())["data"]
+
+# ── Versi SQLite ──
+# Backend SQLite tidak memakai CSV sama sekali: satu versi per (tahun, penanda
+# isi database), berstruktur sama dengan versi CSV (cube, art, lock) sehingga
+# load_search/load_tree/_artefak berlaku untuk keduanya. Baris rincian tahun
+# itu baru dibaca dari database saat halaman Pencarian/Rekening memerlukannya.
+
+def load_version(tahun=None):
+    """Versi data aktif backend ini; SQLite: tahun `tahun` (default terbaru)."""
+    if BACKEND != "sqlite": return current_version()
+    return _sqlite_version(int(tahun or apba_sqlite.years()[-1]), apba_sqlite.data_version())
+
+# Tiap versi dapat memegang rincian setahun beserta indeks cari & pohonnya
+# (art), jadi hanya dua yang disimpan: tahun aktif dan satu pembanding/versi
+# sebelum ingest ulang. Rincian per SKPD di-cache terpisah (_skpd_sqlite).
+@st.cache_resource(max_entries=2)
+def _sqlite_version(tahun, stamp):
+    ver = f"sqlite{stamp}|{tahun}"
+    with phase("build_cube"):
+        c = _cube_sqlite(tahun)
+    c["ver"] = ver
+    return {"ver": ver, "tahun": tahun, "lock": threading.RLock(), "art": {}, "cube": c}
+
+def load_lamp2(v):
+    """Frame Lampiran II versi `v` (SQLite: dimuat sekali per versi saat dipakai)."""
+    if "data" in v: return v["data"][0]
+    return _artefak(v, "lamp2", lambda: apba_sqlite.rincian(v["tahun"]))
+
+def _memory_report(v):
+    fr = dict(zip(FRAMES, v["data"]))
+    rows = []
+    for n, f in SRC.items():
+        old = pd.read_csv(f, dtype=str).memory_usage(deep=True).sum()
+        new = fr[n].memory_usage(deep=True).sum() + sum(load_text(n, c, v["ver"]).memory_usage(deep=True) for c in LAZY[n])
+        rows.append((n, len(fr[n]), old/2**20, new/2**20, (1-new/old)*100 if old else 0.0))
+    return pd.DataFrame(rows, columns=["Frame","Baris","MB dtype=str","MB bertipe","Hemat %"])
+
+def memory_report(v=None):
+    """Memori per frame: dtype=str (cara lama, tanpa kolom turunan) vs skema
+    bertipe. CSV dibaca ulang sekali per versi data, bukan tiap rerun."""
+    v = v or current_version()
+    return _artefak(v, "memori", lambda: _memory_report(v))
+
+
+# ════════════════════════════════════════════
+# AGREGAT (CUBE)
+# ════════════════════════════════════════════
+
+# Rollup belanja level 6 yang dipakai halaman; kunci = tuple sumbu.
+AXES = [("SKPD","KAT","Urusan"), ("SKPD",), ("KAT",), ("Urusan",),
+        ("SKPD","KAT"), ("Urusan","SKPD")]
+
+# Cube disusun dari bagian per lampiran (CUBE_PARTS) agar hot reload cukup
+# menghitung ulang bagian lampiran yang berubah.
+
+def _cube_lamp2(lamp2, urusan_inv, ver):
+    d = lamp2[lamp2["LEVEL_NUM"]==6]
+    kode = d["KODE_REKENING"]
+    b = d[kode.str.startswith("5.",na=False)]   # index = posisi baris lamp2
+    b = b.assign(INDIKATOR=load_text("lamp2","INDIKATOR",ver).iloc[b.index],
+                 Urusan=pd.Categorical(b["SKPD"].astype(object).map(urusan_inv).fillna("Lainnya")))
+    c = {}
+    for ax in AXES:
+        c[ax] = b.groupby(list(ax),observed=True).agg(
+            total=("JUMLAH_NUM","sum"), items=("JUMLAH_NUM","count"),
+            rows=("JUMLAH_NUM","size"), indikator=("INDIKATOR","nunique"))
+    c["kpi"] = {"pend": d.loc[kode.str.startswith("4.",na=False),"JUMLAH_NUM"].sum(),
+                "bel": b["JUMLAH_NUM"].sum()}
+    # diurutkan per SKPD (stabil, urutan dokumen tetap di dalam SKPD) agar
+    # skpd_rows() = slice kontigu → view tanpa salinan per rerun
+    k = b["SKPD"].cat.codes.to_numpy()
+    c["belanja"] = b.iloc[np.argsort(k, kind="stable")]
+    n = np.bincount(k, minlength=len(b["SKPD"].cat.categories)); e = n.cumsum()
+    c["belanja_idx"] = {s: slice(e[i]-n[i], e[i]) for i, s in enumerate(b["SKPD"].cat.categories) if n[i]}
+    return c
+
+def _cube_lamp3(lamp3, urusan_inv, ver):
+    h = lamp3[lamp3["NO"].notna() & (lamp3["NO"]!="") & (lamp3["NO"]!="nan")]
+    h = h.assign(ALAMAT=load_text("lamp3","ALAMAT",ver).iloc[h.index])
+    return {"hibah": h, "hibah_jenis": h.groupby("JENIS_HIBAH",observed=True)["BESARAN_NUM"].sum(),
+            "hibah_top": h.nlargest(15,"BESARAN_NUM")}
+
+def _cube_lamp5(lamp5, urusan_inv, ver):
+    bk = lamp5[lamp5["NO"].notna() & (lamp5["NO"]!="") & (lamp5["NO"]!="nan")]
+    return {"bantuan": bk, "bantuan_jenis": bk.groupby("JENIS",observed=True)["BESARAN_NUM"].sum(),
+            "bantuan_kab": bk.groupby(["NAMA_PENERIMA","JENIS"],observed=True)["BESARAN_NUM"].sum()}
+
+def _cube_lamp7(lamp7, urusan_inv, ver):
+    l7p, sek = classify_otsus(lamp7)
+    return {"otsus": l7p["JUMLAH_NUM"].groupby(sek,observed=True).sum(),
+            "otsus_rows": lamp7, "otsus_pos": np.flatnonzero((lamp7["JUMLAH_NUM"]>0).to_numpy()),
+            "kpi": {"otsus": lamp7["JUMLAH_NUM"].sum() if "JUMLAH_NUM" in lamp7 else 0}}
+
+CUBE_PARTS = {"lamp2": _cube_lamp2, "lamp3": _cube_lamp3, "lamp5": _cube_lamp5, "lamp7": _cube_lamp7}
+
+def build_cube(lamp2, lamp3, lamp5, lamp7, skpd_df, urusan_inv, ver=None, reuse=None):
+    """`reuse` = {lampiran: bagian cube} dari versi sebelumnya yang tetap berlaku."""
+    fr, reuse = dict(zip(FRAMES, (lamp2, lamp3, lamp5, lamp7))), reuse or {}
+    c = {"backend": "csv", "parts": {}, "kpi": {}}
+    for n, f in CUBE_PARTS.items():
+        p = c["parts"][n] = reuse.get(n) or f(fr[n], urusan_inv, ver)
+        c.update((k, x) for k, x in p.items() if k != "kpi")
+        c["kpi"].update(p.get("kpi", {}))
+    c["skpd_rows"] = lambda s: c["belanja"].iloc[c["belanja_idx"][s]]
+    return c
+
+def load_cube(tahun=None, v=None):
+    return (v or load_version(tahun))["cube"]
+
+def _cube_sqlite(tahun):
+    # seluruh agregat dari SQLite untuk satu tahun; hibah/bantuan (Lamp III/V)
+    # tidak di-ingest, jadi halaman Hibah disembunyikan pada backend ini
+    c = {"backend": "sqlite", "kpi": {"pend": 0.0, "bel": 0.0, "otsus": 0.0}}
+    for ax in AXES: c[ax] = apba_sqlite.rollup(tahun, ax)
+    c["kpi"].update(apba_sqlite.kpi(tahun))
+    c["otsus"] = apba_sqlite.otsus(tahun)
+    o = apba_sqlite.rincian(tahun, "VII")[["KODE_REKENING","URAIAN","JUMLAH_NUM"]]
+    c["otsus_rows"], c["otsus_pos"] = o, np.flatnonzero((o["JUMLAH_NUM"]>0).to_numpy())
+    c["skpd_rows"] = lambda s: _skpd_sqlite(c["ver"], tahun, s)["rows"]
+    c["skpd_search"] = lambda s: _skpd_search(_skpd_sqlite(c["ver"], tahun, s))
+    return c
+
+@st.cache_resource(max_entries=8)
+def _skpd_sqlite(ver, tahun, skpd):
+    """Baris belanja satu SKPD (SQLite) + indeks cari-nya, dibangun saat pertama dicari."""
+    return {"rows": apba_sqlite.skpd_rows(tahun, skpd), "ix": None, "lock": threading.Lock()}
+
+def _skpd_search(e):
+    with e["lock"]:
+        if e["ix"] is None:
+            e["ix"] = build_search(e["rows"], ["KODE_REKENING","URAIAN","INDIKATOR"], kode="KODE_REKENING")
+    return e["ix"]
+
+
+# ════════════════════════════════════════════
+# POHON KODE REKENING
+# ════════════════════════════════════════════
+# Urutan dokumen lamp2 = pre-order: baris induk (mis. 5.1.02) langsung diikuti
+# turunannya. Per kedalaman m, run = baris berurutan dengan prefix m segmen
+# sama; kepala run berkedalaman m adalah induk langsung baris lain di run itu.
+# Banyak baris rincian SKPD tercantum tanpa baris induknya (daftar per SKPD
+# setelah pohon konsolidasi). Baris seperti itu diadopsi oleh kemunculan
+# terdekat prefix terpanjang yang ada: di SKPD yang sama dulu, lalu
+# se-lampiran. Anak adopsi ("terpisah") ikut drill-down tetapi tidak ikut
+# validasi subtotal, dan masuk Σ rincian hanya bila induknya tidak punya anak
+# langsung (jika punya, daftar terpisah itu pengulangan rincian yang sama).
+
+LEVEL_NAMA = ["Akun","Kelompok","Jenis","Objek","Rincian Objek","Sub Rincian Objek"]
+AKUN = {"4":"Pendapatan","5":"Belanja","6":"Pembiayaan"}
+TOL_RP = 1.0
+
+def _nearest(key, pos, okey, n):
+    """Posisi baris berkunci `key` terdekat sebelum `pos` (bila tidak ada:
+    sesudahnya, lalu -1). `okey` = kunci·n + posisi, terurut."""
+    if not len(okey): return np.full(len(key), -1, np.int64)
+    j = np.searchsorted(okey, key * n + pos)
+    a, b = okey[np.maximum(j - 1, 0)], okey[np.minimum(j, len(okey) - 1)]
+    return np.where((j > 0) & (a // n == key), a % n,
+                    np.where((j < len(okey)) & (b // n == key), b % n, -1))
+
+def build_tree(lamp2):
+    """Indeks pohon baris lamp2: induk langsung (parent) & adopsi (adopt), anak
+    per induk (CSR kids/ptr), Σ rincian subtree (sub), dan frame tampilan."""
+    codes, uq = pd.factorize(lamp2["KODE_REKENING"].fillna(""))
+    seg = pd.Series(uq, dtype=object).str.split(".")
+    depth = np.where(np.asarray(uq) == "", 0, seg.str.len().to_numpy())[codes]
+    n, u, maxd = len(codes), len(uq), int(depth.max(initial=0))
+    idx = np.arange(n)
+    parent = np.full(n, -1, np.int64)
+    for m in range(1, maxd + 1):
+        key = np.where(depth >= m, pd.factorize(seg.str[:m].str.join("."))[0][codes], -1)
+        start = (depth <= m) | (key != np.r_[-2, key[:-1]])
+        head = np.maximum.accumulate(np.where(start, idx, 0))
+        ok = (depth[head] == m) & (depth > m)
+        parent[ok] = head[ok]
+
+    # adopsi: prefix m segmen tiap kode unik → id kode unik (-1 bila tidak ada)
+    pre = {m: pd.Index(uq).get_indexer(seg.str[:m].str.join(".")) for m in range(1, maxd)}
+    sk = lamp2["SKPD"].cat.codes.to_numpy(np.int64) if "SKPD" in lamp2 else np.zeros(n, np.int64)
+    adopt = np.full(n, -1, np.int64)
+    for g in (sk, np.zeros(n, np.int64)):          # SKPD yang sama, lalu se-lampiran
+        okey = np.sort((g * u + codes) * n + idx)
+        for m in range(maxd - 1, 0, -1):
+            o = np.flatnonzero((parent < 0) & (adopt < 0) & (depth > m))
+            p = pre[m][codes[o]]
+            o, p = o[p >= 0], p[p >= 0]
+            adopt[o] = _nearest(g[o] * u + p, o, okey, n)
+
+    amt = lamp2["JUMLAH_NUM"].to_numpy(dtype=float); a0 = np.nan_to_num(amt)
+    has, ado = parent >= 0, adopt >= 0
+    nkids, nado = np.bincount(parent[has], minlength=n), np.bincount(adopt[ado], minlength=n)
+    eff = np.where(has, parent, np.where(ado & (nkids[np.maximum(adopt, 0)] == 0), adopt, -1))
+    sub = np.where(np.bincount(eff[eff >= 0], minlength=n) == 0, a0, 0.0)
+    for m in range(maxd, 0, -1):                  # bottom-up: anak selesai sebelum induknya
+        c = np.flatnonzero((depth == m) & (eff >= 0))
+        sub += np.bincount(eff[c], weights=sub[c], minlength=n)
+    df = pd.DataFrame({
+        "KODE_REKENING": lamp2["KODE_REKENING"].to_numpy(), "URAIAN": lamp2["URAIAN"].to_numpy(),
+        "LEVEL": depth.astype(np.int8), "HAL_NUM": lamp2["HAL_NUM"].array, "JUMLAH_NUM": amt,
+        "ANAK_NUM": np.where(nkids == 0, np.nan, np.bincount(parent[has], weights=a0[has], minlength=n)),
+        "PISAH_NUM": np.where(nado == 0, np.nan, np.bincount(adopt[ado], weights=a0[ado], minlength=n)),
+        "RINCIAN_NUM": sub, "ANAK": nkids + nado})
+    df["SELISIH_NUM"] = df["ANAK_NUM"] - a0
+    # Akar drill-down: baris kelompok (level 2) tanpa induk atau berinduk baris akun
+    link = np.where(has, parent, adopt)
+    pr = np.where(link >= 0, link, idx)
+    top = np.flatnonzero((depth == 2) & ((link < 0) | (depth[pr] == 1)))
+    ak = pd.Series(df["KODE_REKENING"].to_numpy()[top]).str.split(".").str[0]
+    return {"df": df, "parent": parent, "adopt": adopt, "link": link, "sub": sub, "top": top,
+            "kids": np.flatnonzero(link >= 0)[np.argsort(link[link >= 0], kind="stable")],
+            "ptr": np.r_[0, np.cumsum(nkids + nado)],
+            "akun": {a: top[g] for a, g in ak.groupby(ak).indices.items()},
+            "orphan": int(ado.sum())}
+
+def tree_kids(t, i):
+    """Anak langsung lalu anak adopsi `i`, dalam urutan dokumen."""
+    return t["kids"][t["ptr"][i]:t["ptr"][i+1]]
+
+def tree_total(t, i):
+    """Σ baris rincian di subtree `i` (skalar atau array posisi)."""
+    return t["sub"][i]
+
+def validate_tree(t, tol=TOL_RP):
+    """(bad, lepas): posisi baris induk yang jumlah terteranya berbeda > `tol`
+    rupiah dari jumlah anak langsungnya (jumlah kosong dihitung 0), dan posisi
+    baris yang tidak terjangkau drill-down dari akar akun mana pun."""
+    bad = np.flatnonzero(np.abs(t["df"]["SELISIH_NUM"].to_numpy()) > tol)
+    depth, link = t["df"]["LEVEL"].to_numpy(), t["link"]
+    cov = np.zeros(len(depth), bool); cov[t["top"]] = True
+    for m in range(3, int(depth.max(initial=0)) + 1):   # induk selalu lebih dangkal
+        c = np.flatnonzero((depth == m) & (link >= 0))
+        cov[c] |= cov[link[c]]
+    return bad, np.flatnonzero(~cov & (depth != 1))
+
+def _tree(v):
+    t = build_tree(load_lamp2(v))
+    t["ver"] = v["ver"]
+    t["bad"], t["lepas"] = validate_tree(t)
+    return t
+
+def load_tree(v=None):
+    v = v or load_version()
+    return _artefak(v, "tree", lambda: _tree(v))
+
+
+# ════════════════════════════════════════════
+# INDEKS PENERIMA (ENTITAS)
+# ════════════════════════════════════════════
+# Nama penerima hibah (Lamp III) & bantuan (Lamp V) ditulis bebas. Nama
+# dinormalisasi (ejaan lama, singkatan, tanda baca, "Al-"), lalu hanya nama
+# yang berbagi kunci blok (fonetik token pembeda kecuali satu, atau fonetik
+# token pembeda digabung tanpa spasi; + angka + jenis lembaga) yang
+# dibandingkan, masing-masing dengan ≤ RX_WINDOW tetangga terurut; pasangan
+# mirip digabung lewat union-find. Hasil: id entitas per baris alokasi +
+# posting list (CSR).
+
+RX_SIM, RX_TOK_SIM, RX_WINDOW = 0.9, 0.9, 25
+RX_ABBR = {"KAB":"KABUPATEN","YYS":"YAYASAN","YAY":"YAYASAN","GP":"GAMPONG","GAMP":"GAMPONG",
+           "DS":"DESA","PONPES":"PONDOK PESANTREN","PP":"PONDOK PESANTREN","MESJID":"MASJID",
+           "MSJ":"MASJID","KEL":"KELURAHAN","KEC":"KECAMATAN"}
+RX_JENIS = {"YAYASAN","KABUPATEN","KOTA","DESA","GAMPONG","PONDOK","PESANTREN","DAYAH",
+            "MASJID","KELURAHAN","KECAMATAN"}
+RX_EJAAN = [("TJ","C"),("DJ","J"),("NJ","NY"),("OE","U")]      # ejaan lama → EYD
+RX_FON = [("SJ","SY"),("CH","KH"),("KH","K"),("SY","S"),("DH","D"),("TH","T"),("PH","F"),
+          ("Q","K"),("Z","S"),("V","F"),("Y","I"),("W","U")]
+
+def norm_nama(s):
+    if s is None or s != s: return ""          # None / NaN
+    t = re.sub(r"[^A-Z0-9]+", " ", str(s).upper())
+    for a, b in RX_EJAAN: t = t.replace(a, b)
+    t = " ".join(RX_ABBR.get(w, w) for w in t.split())
+    return re.sub(r"\b(AL|EL|AR|AS|AN|AD|ASY|AT|AZ) (?=[A-Z])", r"\1", t)
+
+def fonetik(w, n=5):
+    if not w: return ""
+    for a, b in RX_FON: w = w.replace(a, b)
+    return re.sub(r"(.)\1+", r"\1", w[0] + re.sub(r"[AIUEO]", "", w[1:]))[:n]
+
+def _rx_keys(s):
+    """(kunci blok, {fonetik: token} token pembeda) untuk nama ternormalisasi.
+    Angka dan kata jenis lembaga (RX_JENIS) harus sama persis: ikut di kunci.
+    Nama kosong (mis. "-", "...") tidak mendapat kunci blok."""
+    if not s: return set(), {}
+    tok = s.split()
+    num = " ".join(sorted(t for t in tok if t.isdigit()))
+    jenis = " ".join(sorted({t for t in tok if t in RX_JENIS}))
+    ph = {fonetik(t): t for t in tok if not t.isdigit() and t not in RX_JENIS} \
+        or {fonetik(s.replace(" ", "")): s}
+    # pasangan mirip berbeda ≤ 1 token → pasti berbagi satu subset (k-1) token;
+    # beda spasi saja ("LAM ARA" / "LAMARA") → sama fonetik gabungannya
+    ks = sorted(ph)
+    bk = {tuple(k for k in ks if k != x) for x in ks} if len(ks) > 1 else {(ks[0],), (ph[ks[0]][:3],)}
+    bk.add(("=" + fonetik("".join(ph.values()), None),))
+    return {(b, num, jenis) for b in bk}, ph
+
+def _rx_mirip(a, b, pa, pb):
+    # token pembeda harus sama bunyinya, kecuali satu yang ejaannya mirip
+    # (jumlah token beda: gabungan token pembeda tanpa spasi harus mirip);
+    # baru kemudian rasio seluruh nama
+    if a == b: return True
+    if len(pa) != len(pb):
+        if difflib.SequenceMatcher(None, "".join(pa.values()), "".join(pb.values())).ratio() < RX_TOK_SIM:
+            return False
+    elif len(da := pa.keys() - pb.keys()) > 1: return False
+    elif da:
+        ta, tb = pa[da.pop()], pb[(pb.keys() - pa.keys()).pop()]
+        if abs(len(ta)-len(tb)) > (1-RX_TOK_SIM) * max(len(ta), len(tb)) \
+                or difflib.SequenceMatcher(None, ta, tb).ratio() < RX_TOK_SIM: return False
+    if abs(len(a)-len(b)) > (1-RX_SIM) * max(len(a), len(b)): return False
+    sm = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    return sm.quick_ratio() >= RX_SIM and sm.ratio() >= RX_SIM
+
+def build_recipients(cube, tahun=2025):
+    h, b = cube["hibah"], cube["bantuan"]
+    al = pd.concat([
+        pd.DataFrame({"LAMPIRAN":"III", "TAHUN":tahun, "NAMA_PENERIMA":h["NAMA_PENERIMA"].astype(object).to_numpy(),
+                      "ALAMAT":h["ALAMAT"].astype(object).to_numpy(), "JENIS":h["JENIS_HIBAH"].astype(object).to_numpy(),
+                      "BESARAN_NUM":h["BESARAN_NUM"].to_numpy()}),
+        pd.DataFrame({"LAMPIRAN":"V", "TAHUN":tahun, "NAMA_PENERIMA":b["NAMA_PENERIMA"].astype(object).to_numpy(),
+                      "ALAMAT":None, "JENIS":b["JENIS"].astype(object).to_numpy(), "BESARAN_NUM":b["BESARAN_NUM"].to_numpy()}),
+    ], ignore_index=True)
+    al["NAMA_PENERIMA"] = al["NAMA_PENERIMA"].fillna("")
+    raw, ruq = pd.factorize(al["NAMA_PENERIMA"])
+    nc, nuq = pd.factorize(pd.Series([norm_nama(x) for x in ruq], dtype=object))
+    flat = [s.replace(" ", "") for s in nuq]
+    blok, ph = {}, []
+    for i, s in enumerate(nuq):
+        ks, p = _rx_keys(s); ph.append(p)
+        for k in ks: blok.setdefault(k, []).append(i)
+
+    uf = list(range(len(nuq)))
+    def find(x):
+        while uf[x] != x: uf[x] = uf[uf[x]]; x = uf[x]
+        return x
+    for m in blok.values():
+        m = sorted(m, key=flat.__getitem__)
+        for j, a in enumerate(m):
+            for c in m[j+1:j+1+RX_WINDOW]:
+                if find(a) != find(c) and _rx_mirip(flat[a], flat[c], ph[a], ph[c]): uf[find(c)] = find(a)
+    eid_n = pd.factorize(np.array([find(i) for i in range(len(nuq))], dtype=np.int64))[0]
+    al["EID"] = eid = eid_n[nc[raw]] if len(al) else np.zeros(0, np.int64)
+
+    ne = int(eid.max(initial=-1)) + 1
+    cnt = al.groupby(["EID","NAMA_PENERIMA"]).size().sort_values(ascending=False, kind="stable")
+    nama = cnt.groupby(level=0).head(1).reset_index().set_index("EID")["NAMA_PENERIMA"].reindex(range(ne))
+    return {"rows": al, "pos": np.argsort(eid, kind="stable"), "ptr": np.r_[0, np.cumsum(np.bincount(eid, minlength=ne))],
+            "nama": nama.to_numpy(), "varian": cnt.groupby(level=0).size().reindex(range(ne)).to_numpy(),
+            "key": dict(zip(nuq, eid_n)), "blok": blok, "nuq": list(nuq), "flat": flat, "ph": ph}
+
+def recipient_lookup(rx, q):
+    """Id entitas untuk nama bebas `q`: cocok persis setelah normalisasi, jika
+    tidak kandidat terdekat di blok yang sama; None bila tidak ada."""
+    s = norm_nama(q)
+    if not s: return None
+    if s in rx["key"]: return int(rx["key"][s])
+    ks, p = _rx_keys(s); a = s.replace(" ", "")
+    best = max(((difflib.SequenceMatcher(None, a, rx["flat"][i], autojunk=False).ratio(), i)
+                for k in ks for i in rx["blok"].get(k, ())
+                if _rx_mirip(a, rx["flat"][i], p, rx["ph"][i])), default=None)
+    return None if best is None else int(rx["key"][rx["nuq"][best[1]]])
+
+def recipient_rows(rx, e):
+    return rx["rows"].iloc[rx["pos"][rx["ptr"][e]:rx["ptr"][e+1]]]
+
+def agg_top_penerima(rx, lampiran="III", n=15):
+    """Top penerima per entitas (ejaan berbeda digabung) di satu lampiran."""
+    r = rx["rows"][rx["rows"]["LAMPIRAN"] == lampiran]
+    g = r.groupby("EID")["BESARAN_NUM"].agg(["sum","size"]).nlargest(n, "sum")
+    return pd.DataFrame({"Penerima": rx["nama"][g.index], "Besaran (Rp)": g["sum"].to_numpy(),
+                         "Alokasi": g["size"].to_numpy(), "Ejaan": rx["varian"][g.index]})
+
+def load_recipients(v=None):
+    v = v or current_version()
+    return _artefak(v, "rx", lambda: build_recipients(v["cube"]))
+
+
+# ════════════════════════════════════════════
+# PENCARIAN (INDEKS TRIGRAM)
+# ════════════════════════════════════════════
+
+# Per field, teks difaktorkan ke string unik; inverted index trigram → posting
+# list id string unik (CSR: ptr + post), dan id unik → posisi baris (CSR).
+# Term ≥3 huruf: irisan posting list (trigram yang dimuat > GRAM_MAX string
+# unik dilewati), kandidat diverifikasi per string unik lalu dipetakan ke
+# baris. Term berbentuk kode rekening juga dicari sebagai prefix di array kode
+# terurut; hasilnya digabung dengan hasil teks, bukan menggantikannya.
+KODE_RE = re.compile(r"^\d+(\.\d+)*\.?$")
+GRAM_MAX = 0.5
+
+def _grams(t):
+    return {t[i:i+3] for i in range(len(t)-2)}
+
+def _csr(keys, vals, nk):
+    o = np.argsort(keys, kind="stable")
+    return np.searchsorted(keys[o], np.arange(nk + 1)), vals[o].astype(np.int32)
+
+def build_search(df, fields, kode=None, amount=None, text=None):
+    n = len(df)
+    amt = df[amount].fillna(0).to_numpy(float) if amount else np.zeros(n)
+    ix = {"df": df, "n": n, "fields": fields, "codes": {}, "uq": {}, "gram": {}, "rows": {},
+          "by_amount": np.argsort(-amt, kind="stable").astype(np.int32), "kode": kode}
+    ix["rank"] = np.empty(n, np.int32); ix["rank"][ix["by_amount"]] = np.arange(n)
+    for f in fields:
+        # faktorkan dulu, lower-case per string unik, lalu gabung varian huruf
+        codes, uq = pd.factorize(text[f] if text and f in text else df[f])
+        lc, uq = pd.factorize(pd.Series(np.append(np.asarray(uq, dtype=object), ""), dtype=object).astype(str).str.lower())
+        ix["codes"][f], ix["uq"][f] = codes, uq = lc[codes].astype(np.int32), np.asarray(uq, dtype=object)
+        gid, gl = {}, [_grams(t) for t in uq]
+        g = np.fromiter((gid.setdefault(x, len(gid)) for s in gl for x in s), np.int64)
+        u = np.repeat(np.arange(len(uq)), [len(s) for s in gl])
+        ix["gram"][f] = (gid, *_csr(g, u, len(gid)))
+        ix["rows"][f] = _csr(codes, np.arange(n), len(uq))
+    if kode:
+        ix["kode_ord"] = np.argsort(ix["uq"][kode])
+        ix["kode_sorted"] = ix["uq"][kode][ix["kode_ord"]]
+    return ix
+
+def _contains(ix, f, rows, fn):
+    # evaluasi fn per teks unik, bukan per baris
+    c = ix["codes"][f][rows]
+    m = np.zeros(len(ix["uq"][f]), bool); m[c] = True
+    u = np.flatnonzero(m)
+    m[u] = np.fromiter((fn(x) for x in ix["uq"][f][u]), bool, len(u))
+    return m[c]
+
+def _unik(ix, f, t):
+    """Id string unik field `f` yang memuat `t`."""
+    uq, (gid, ptr, post) = ix["uq"][f], ix["gram"][f]
+    c = None
+    if len(t) >= 3:
+        posts = []
+        for g in _grams(t):
+            i = gid.get(g)
+            if i is None: return np.empty(0, np.int64)
+            if ptr[i+1] - ptr[i] <= GRAM_MAX * len(uq): posts.append(post[ptr[i]:ptr[i+1]])
+        posts.sort(key=len)
+        for p in posts: c = p if c is None else np.intersect1d(c, p, assume_unique=True)
+    c = np.arange(len(uq)) if c is None else c
+    return c[np.fromiter((t in x for x in uq[c]), bool, len(c))]
+
+def _match(ix, t, cand):
+    """(posisi baris terurut yang memuat `t` di salah satu field, skor)."""
+    # bobot field: field pertama paling relevan; +0.5 bila term di awal kata
+    n, us, hits = ix["n"], {}, []
+    for w, f in zip(range(len(ix["fields"]), 0, -1), ix["fields"]):
+        u = _unik(ix, f, t)
+        if not len(u): continue
+        us[f] = np.zeros(len(ix["uq"][f]))
+        us[f][u] = w + 0.5 * np.fromiter((x.startswith(t) or f" {t}" in x for x in ix["uq"][f][u]), bool, len(u))
+        ptr, pos = ix["rows"][f]; cnt = ptr[u+1] - ptr[u]
+        hits.append((pos, ptr[u], cnt))
+    kode = None
+    if ix["kode"] and KODE_RE.match(t):
+        lo, hi = np.searchsorted(ix["kode_sorted"], [t, t + "\uffff"])
+        u = ix["kode_ord"][lo:hi]
+        ptr, pos = ix["rows"][ix["kode"]]; cnt = ptr[u+1] - ptr[u]
+        kode = pos[np.repeat(ptr[u] - np.cumsum(cnt) + cnt, cnt) + np.arange(cnt.sum())]
+        hits.append((kode, np.zeros(1, np.int64), np.array([len(kode)])))
+    if cand is None:
+        # hasil sedikit: gabung posting baris; hasil banyak: satu pass per field
+        if sum(int(c.sum()) for *_, c in hits) * 8 < n:
+            cand = np.unique(np.concatenate([pos[np.repeat(p - np.cumsum(c) + c, c) + np.arange(c.sum())]
+                                             for pos, p, c in hits] or [np.empty(0, np.int32)])).astype(np.int32)
+        else:
+            cand = np.arange(n, dtype=np.int32)
+    sc = np.zeros(len(cand))
+    for f, x in us.items(): sc = np.maximum(sc, x[ix["codes"][f][cand]])
+    if kode is not None:
+        sc = np.maximum(sc, (len(ix["fields"]) + 1.0) * np.isin(cand, kode))
+    return cand[sc > 0], sc[sc > 0]
+
+def search(ix, q, limit=None, offset=0, within=None):
+    """Cari `q` (AND antar kata, case-insensitive). Mengembalikan (posisi baris
+    ix["df"] terurut relevansi lalu nilai, jumlah total hasil)."""
+    terms = q.lower().split()
+    cand = None if within is None else np.unique(np.asarray(within, dtype=np.int32))
+    score = None
+    for t in terms:
+        rows, sc = _match(ix, t, cand)
+        score = sc if score is None else score[np.searchsorted(cand, rows)] + sc
+        cand = rows
+        if not len(cand): break
+    if cand is None or not len(cand): return np.empty(0, np.int32), 0
+    if len(terms) > 1:
+        ph = " ".join(terms)
+        score = score + np.any([_contains(ix, f, cand, lambda x: ph in x) for f in ix["fields"]], axis=0)
+    # urut skor lalu nilai (peringkat nilai global dihitung sekali saat build);
+    # hasil besar: saring urutan global lalu sort stabil int16 per skor, O(n)
+    end = None if limit is None else offset + limit
+    if len(cand) * 16 < ix["n"]:
+        return cand[np.lexsort((ix["rank"][cand], -score))][offset:end], len(cand)
+    m = np.zeros(ix["n"], np.int16); m[cand] = -2 * score - 1
+    r = ix["by_amount"][m[ix["by_amount"]] != 0]
+    return r[np.argsort(m[r], kind="stable")][offset:end], len(cand)
+
+def load_search(name="lamp2", v=None):
+    """Indeks pencarian `name` ("lamp2" | "hibah") versi `v`; dibangun saat
+    pertama kali dipakai (hanya halaman yang mencari yang menanggungnya)."""
+    v = v or load_version()
+    def build():
+        if name == "lamp2":
+            ix = build_search(load_lamp2(v), ["KODE_REKENING","URAIAN","INDIKATOR"], kode="KODE_REKENING",
+                              amount="JUMLAH_NUM", text={"INDIKATOR": load_text("lamp2","INDIKATOR",v["ver"])} if "data" in v else None)
+        else:
+            ix = build_search(v["cube"]["hibah"], ["NAMA_PENERIMA","ALAMAT"], amount="BESARAN_NUM")
+        ix["ver"] = v["ver"]
+        return ix
+    with phase(f"load_search {name}"):
+        return _artefak(v, f"search.{name}", build)
+
+
+# ════════════════════════════════════════════
+# CACHE FIGURE
+# ════════════════════════════════════════════
+
+# LRU bersama antar sesi: kunci (halaman/chart, nilai widget, versi data),
+# nilai = objek Figure yang sudah tervalidasi (dibaca saja; st.plotly_chart
+# cukup memanggil to_dict(), sedangkan dict/JSON akan divalidasi ulang tiap
+# rerun). Dibatasi total ukuran JSON-nya (APBA_FIG_CACHE_MB).
+FIG_CACHE_MB = float(os.environ.get("APBA_FIG_CACHE_MB", 64))
+
+@st.cache_resource
+def fig_cache():
+    return {"lru": OrderedDict(), "bytes": 0, "hit": 0, "miss": 0, "lock": threading.Lock()}
+
+def chart(cube, cid, state, build):
+    fc = fig_cache()
+    key = (cid, state, cube["ver"])
+    with fc["lock"]:
+        e = fc["lru"].get(key)
+        if e is not None:
+            fc["lru"].move_to_end(key); fc["hit"] += 1
+    with phase(f"chart {cid}") as p:
+        p["cache"] = "miss" if e is None else "hit"
+        if e is None:
+            with phase("build figure"):
+                fig = build()
+                e = (fig, len(fig.to_json()))
+            with fc["lock"]:
+                fc["miss"] += 1
+                if key not in fc["lru"]:
+                    fc["lru"][key] = e; fc["bytes"] += e[1]
+                while fc["bytes"] > FIG_CACHE_MB * 2**20 and len(fc["lru"]) > 1:
+                    fc["bytes"] -= fc["lru"].popitem(last=False)[1][1]
+        with phase("st.plotly_chart"):
+            st.plotly_chart(e[0], use_container_width=True)
+
+def table(df, fmt, **kw):
+    with phase("tabel (Styler)", len(df)):
+        st.dataframe(df.style.format(fmt), use_container_width=True, **kw)
+
+
+# ════════════════════════════════════════════
+# TABEL TERPAGINASI (SERVER-SIDE)
+# ════════════════════════════════════════════
+# Urutan per kolom (stabil, NaN di akhir) dihitung sekali per dataset lalu
+# dipakai ulang untuk tiap subset hasil filter; hanya halaman yang tampil
+# yang di-slice dan diformat. Ukuran & nomor halaman disimpan di session state.
+
+PAGE_SIZES = [25, 50, 100, 250]
+SORT_CACHE_N = 256
+
+@st.cache_resource
+def sort_cache():
+    return {"lru": OrderedDict(), "lock": threading.Lock()}
+
+def sort_order(dsid, base, col):
+    """(posisi baris `base` terurut naik menurut `col`, jumlah NaN di ekor)."""
+    sc, k = sort_cache(), (dsid, col)
+    with sc["lock"]:
+        if k in sc["lru"]:
+            sc["lru"].move_to_end(k)
+            return sc["lru"][k]
+    v = base[col].reset_index(drop=True)
+    o = (v.sort_values(kind="stable", na_position="last").index.to_numpy(np.int64), int(v.isna().sum()))
+    with sc["lock"]:
+        sc["lru"][k] = o
+        while len(sc["lru"]) > SORT_CACHE_N: sc["lru"].popitem(last=False)
+    return o
+
+def order_rows(dsid, base, rows, col=None, turun=True):
+    """`rows` (posisi di `base`) terurut menurut `col`; None = urutan `rows` apa adanya."""
+    if col is None: return rows
+    full, nn = sort_order(dsid, base, col)
+    if turun: full = np.r_[full[:len(full)-nn][::-1], full[len(full)-nn:]]
+    if len(rows) == len(base): return full
+    m = np.zeros(len(base), bool); m[rows] = True
+    return full[m[full]]
+
+def ptable(key, dsid, base, rows, cols, money=(), sort=None, natural=None, height=400):
+    """Tabel `base.iloc[rows]` dengan kolom {kolom: label}. `sort` = label urut
+    awal (menurun); `natural` = label untuk urutan `rows` apa adanya (mis. relevansi)."""
+    ss, rows = st.session_state, np.asarray(rows, dtype=np.int64)
+    opts = ([natural] if natural else []) + list(cols.values())
+    inv = {v: k for k, v in cols.items()}
+    c1, c2, c3, c4 = st.columns([3, 2, 2, 2])
+    by = c1.selectbox("Urutkan:", opts, index=opts.index(sort or natural), key=f"{key}_by")
+    turun = c2.selectbox("Arah:", ["Menurun","Menaik"], key=f"{key}_dir", disabled=by == natural) == "Menurun"
+    ps = c3.selectbox("Baris/halaman:", PAGE_SIZES, index=PAGE_SIZES.index(100), key=f"{key}_ps")
+    n = len(rows); npg = max(1, -(-n // ps))
+    sig = (dsid, n, by, turun, ps, rows[:3].tobytes(), rows[-3:].tobytes())
+    if ss.get(f"{key}_sig") != sig:
+        ss[f"{key}_sig"], ss[f"{key}_pg"] = sig, 1
+    pg = c4.number_input("Halaman:", 1, npg, key=f"{key}_pg")
+
+    with phase("urut & halaman", n):
+        o = order_rows(dsid, base, rows, None if by == natural else inv[by], turun)
+        page = base.iloc[o[(pg-1)*ps:pg*ps]][list(cols)].rename(columns=cols)
+    with phase("tabel (halaman)", len(page)):
+        st.dataframe(page.style.format({c: "{:,.0f}" for c in money}), use_container_width=True, height=height)
+    st.caption(f"Baris {min((pg-1)*ps+1, n):,}–{min(pg*ps, n):,} dari {n:,}")
+
+
+# ════════════════════════════════════════════
+# EKSPOR
+# ════════════════════════════════════════════
+# File unduhan dibangun hanya saat diminta (tombol "Siapkan"), ditulis per
+# chunk baris, lalu di-cache per (dataset, filter, format) dengan batas ukuran.
+
+EXPORT_CACHE_MB = float(os.environ.get("APBA_EXPORT_CACHE_MB", 128))
+EXPORT_CHUNK = 50_000
+XLSX_MAX = 1_048_575
+EXPORT_FMT = {
+    "CSV": ("csv", "text/csv"),
+    "CSV.gz": ("csv.gz", "application/gzip"),
+    "XLSX": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+try:
+    import pyarrow as pa, pyarrow.parquet as pq
+except ImportError:
+    pa = None; del EXPORT_FMT["Parquet"]
+
+@st.cache_resource
+def export_cache():
+    return {"lru": OrderedDict(), "bytes": 0, "lock": threading.Lock()}
+
+def _chunks(df):
+    for i in range(0, max(len(df), 1), EXPORT_CHUNK):
+        yield i, df.iloc[i:i+EXPORT_CHUNK]
+
+def _write_csv(df, fh):
+    for i, ch in _chunks(df):
+        fh.write(ch.to_csv(index=False, header=i == 0).encode("utf-8"))
+
+def export_bytes(df, fmt):
+    buf = io.BytesIO()
+    if fmt == "CSV":
+        _write_csv(df, buf)
+    elif fmt == "CSV.gz":
+        with gzip.GzipFile(fileobj=buf, mode="wb", compresslevel=6, mtime=0) as gz: _write_csv(df, gz)
+    elif fmt == "XLSX":
+        if len(df) > XLSX_MAX:
+            raise ValueError(f"XLSX maksimal {XLSX_MAX:,} baris ({len(df):,} baris); gunakan CSV.gz atau Parquet.")
+        from openpyxl import Workbook
+        wb = Workbook(write_only=True); ws = wb.create_sheet("data")
+        ws.append([str(c) for c in df.columns])
+        for _, ch in _chunks(df):
+            ch = ch.astype(object)
+            for r in ch.where(ch.notna(), None).itertuples(index=False, name=None):
+                ws.append(r)
+        wb.save(buf)
+    elif fmt == "Parquet":
+        w = None
+        for _, ch in _chunks(df):
+            t = pa.Table.from_pandas(ch, preserve_index=False)
+            w = w or pq.ParquetWriter(buf, t.schema)
+            w.write_table(t)
+        w.close()
+    return buf.getvalue()
+
+def export(key, frame, fmt):
+    """Bytes ekspor untuk `key` = (dataset, filter..., format), dari cache bila ada."""
+    ec = export_cache()
+    with ec["lock"]:
+        if key in ec["lru"]:
+            ec["lru"].move_to_end(key)
+            return ec["lru"][key]
+    with phase(f"ekspor {fmt}") as p:
+        df = frame(); p["rows"] = len(df)
+        data = export_bytes(df, fmt)
+    with ec["lock"]:
+        if len(data) <= EXPORT_CACHE_MB * 2**20 and key not in ec["lru"]:
+            ec["lru"][key] = data; ec["bytes"] += len(data)
+        while ec["bytes"] > EXPORT_CACHE_MB * 2**20:
+            ec["bytes"] -= len(ec["lru"].popitem(last=False)[1])
+    return data
+
+def export_ui(key, ident, frame, name):
+    """Pilih format → "Siapkan" membangun file (sekali per dataset/filter/format) → Download."""
+    c1, c2 = st.columns([1, 2])
+    fmt = c1.selectbox("Format unduhan:", list(EXPORT_FMT), key=f"{key}_fmt")
+    ext, mime = EXPORT_FMT[fmt]
+    k, ec = (*ident, fmt), export_cache()
+    with ec["lock"]:
+        data = ec["lru"].get(k)
+    if data is None and c2.button(f"📦 Siapkan {fmt}", key=f"{key}_prep"):
+        try: data = export(k, frame, fmt)
+        except ValueError as e: c2.warning(str(e))
+    if data is not None:
+        c2.download_button(f"📥 Download {fmt} ({len(data)/2**20:,.1f} MB)", data, f"{name}.{ext}", mime, key=f"{key}_dl")
+
+def fig_cache_stats():
+    fc = fig_cache()
+    n = fc["hit"] + fc["miss"]
+    return {"entries": len(fc["lru"]), "mb": fc["bytes"] / 2**20,
+            "hit": fc["hit"], "miss": fc["miss"], "hit_rate": fc["hit"] / n if n else 0.0}
 
 
 # ════════════════════════════════════════════
 # PAGE 1: RINGKASAN EKSEKUTIF
 # ════════════════════════════════════════════
 
-def pg_ringkasan(lamp2, lamp3, lamp5, lamp7, urusan_inv):
+# agg_* = data di balik tiap chart; dipakai juga oleh apba_api.py
+
+def agg_kpi(cube):
+    k = cube["kpi"]
+    return {"pendapatan": k["pend"], "belanja": k["bel"], "surplus": k["pend"]-k["bel"], "otsus": k["otsus"]}
+
+def agg_komposisi(cube):
+    km = cube[("KAT",)]["total"].reset_index()
+    km = km[km["total"]>0].sort_values("total",ascending=False)
+    km.columns = ["Kategori","Jumlah"]
+    return km
+
+def agg_top_skpd(cube, n=15):
+    st15 = cube[("SKPD",)]["total"].reset_index()
+    st15.columns = ["SKPD","Total"]
+    return st15.sort_values("Total",ascending=True).tail(n)
+
+def agg_urusan(cube):
+    tm = cube[("Urusan","SKPD")]["total"].reset_index()
+    tm.columns = ["Urusan","SKPD","Anggaran"]
+    return tm[tm["Anggaran"]>0]
+
+def fig_komposisi(cube):
+    km = agg_komposisi(cube)
+    fig = px.pie(km, values="Jumlah", names="Kategori", color="Kategori",
+                 color_discrete_map=BC, hole=0.4)
+    fig.update_traces(textposition="inside", textinfo="percent+label",
+        hovertemplate="<b>%{label}</b><br>Rp %{value:,.0f}<br>%{percent}<extra></extra>")
+    fig.update_layout(showlegend=False, height=420, margin=dict(t=20,b=20,l=20,r=20))
+    return fig
+
+def fig_top_skpd(cube):
+    st15 = agg_top_skpd(cube)
+    fig = px.bar(st15, x="Total", y="SKPD", orientation="h",
+                 color_discrete_sequence=[CP["primary"]])
+    fig.update_traces(hovertemplate="<b>%{y}</b><br>Rp %{x:,.0f}<extra></extra>")
+    fig.update_layout(height=420, xaxis_title="", yaxis_title="",
+                      margin=dict(t=20,b=20,l=10,r=10), xaxis=dict(tickformat=",.0f"))
+    return fig
+
+def fig_urusan(cube):
+    tm = agg_urusan(cube)
+    fig = px.treemap(tm, path=["Urusan","SKPD"], values="Anggaran",
+                     color="Anggaran", color_continuous_scale="Blues")
+    fig.update_traces(hovertemplate="<b>%{label}</b><br>Rp %{value:,.0f}<br>%{percentRoot:.1%}<extra></extra>")
+    fig.update_layout(height=500, margin=dict(t=30,b=10,l=10,r=10), coloraxis_showscale=False)
+    return fig
+
+def pg_ringkasan(cube):
     st.markdown("## 📊 Ringkasan Eksekutif APBA 2025")
-    d = lamp2[lamp2["LEVEL_NUM"]==6].copy()
-    pend = d[d["KODE_REKENING"].str.startswith("4.",na=False)]["JUMLAH_NUM"].sum()
-    bel  = d[d["KODE_REKENING"].str.startswith("5.",na=False)]["JUMLAH_NUM"].sum()
-    sur  = pend - bel
-    otsus = lamp7["JUMLAH_NUM"].sum() if "JUMLAH_NUM" in lamp7 else 0
+    k = agg_kpi(cube)
+    pend, bel, sur, otsus = k["pendapatan"], k["belanja"], k["surplus"], k["otsus"]
 
     c1,c2,c3,c4 = st.columns(4)
     c1.metric("💰 Pendapatan", rp(pend,True))
@@ -176,300 +1385,420 @@ def pg_ringkasan(lamp2, lamp3, lamp5, lamp7, urusan_inv):
     L,R = st.columns(2)
     with L:
         st.markdown("### Komposisi Belanja")
-        bd = d[d["KODE_REKENING"].str.startswith("5.",na=False)]
-        km = bd.groupby("KAT")["JUMLAH_NUM"].sum().reset_index()
-        km = km[km["JUMLAH_NUM"]>0].sort_values("JUMLAH_NUM",ascending=False)
-        km.columns = ["Kategori","Jumlah"]
-        fig = px.pie(km, values="Jumlah", names="Kategori", color="Kategori",
-                     color_discrete_map=BC, hole=0.4)
-        fig.update_traces(textposition="inside", textinfo="percent+label",
-            hovertemplate="<b>%{label}</b><br>Rp %{value:,.0f}<br>%{percent}<extra></extra>")
-        fig.update_layout(showlegend=False, height=420, margin=dict(t=20,b=20,l=20,r=20))
-        st.plotly_chart(fig, use_container_width=True)
+        chart(cube, "ringkasan/komposisi", (), lambda: fig_komposisi(cube))
 
     with R:
         st.markdown("### Top 15 SKPD")
-        st15 = bd.groupby("SKPD")["JUMLAH_NUM"].sum().reset_index()
-        st15.columns = ["SKPD","Total"]
-        st15 = st15.sort_values("Total",ascending=True).tail(15)
-        fig = px.bar(st15, x="Total", y="SKPD", orientation="h",
-                     color_discrete_sequence=[CP["primary"]])
-        fig.update_traces(hovertemplate="<b>%{y}</b><br>Rp %{x:,.0f}<extra></extra>")
-        fig.update_layout(height=420, xaxis_title="", yaxis_title="",
-                          margin=dict(t=20,b=20,l=10,r=10), xaxis=dict(tickformat=",.0f"))
-        st.plotly_chart(fig, use_container_width=True)
+        chart(cube, "ringkasan/top_skpd", (), lambda: fig_top_skpd(cube))
 
     st.markdown("### Alokasi per Urusan Pemerintahan")
-    bd2 = bd.copy()
-    bd2["Urusan"] = bd2["SKPD"].map(urusan_inv).fillna("Lainnya")
-    tm = bd2.groupby(["Urusan","SKPD"])["JUMLAH_NUM"].sum().reset_index()
-    tm.columns = ["Urusan","SKPD","Anggaran"]
-    tm = tm[tm["Anggaran"]>0]
-    fig = px.treemap(tm, path=["Urusan","SKPD"], values="Anggaran",
-                     color="Anggaran", color_continuous_scale="Blues")
-    fig.update_traces(hovertemplate="<b>%{label}</b><br>Rp %{value:,.0f}<br>%{percentRoot:.1%}<extra></extra>")
-    fig.update_layout(height=500, margin=dict(t=30,b=10,l=10,r=10), coloraxis_showscale=False)
-    st.plotly_chart(fig, use_container_width=True)
+    chart(cube, "ringkasan/urusan", (), lambda: fig_urusan(cube))
 
 
 # ════════════════════════════════════════════
 # PAGE 2: EKSPLORASI BELANJA
 # ════════════════════════════════════════════
 
-def pg_eksplorasi(lamp2):
+def fig_proporsi(cube, sel):
+    sb = cube["skpd_rows"](sel)
+    sa = sb.groupby([sb["KAT"], sb["URAIAN"].str[:40].rename("U")],observed=True)["JUMLAH_NUM"].sum().reset_index()
+    sa = sa[sa["JUMLAH_NUM"]>0].nlargest(30,"JUMLAH_NUM").astype({"KAT":str})
+    fig = px.sunburst(sa, path=["KAT","U"], values="JUMLAH_NUM",
+                      color="KAT", color_discrete_map=BC)
+    fig.update_traces(hovertemplate="<b>%{label}</b><br>Rp %{value:,.0f}<extra></extra>")
+    fig.update_layout(height=450, margin=dict(t=10,b=10,l=10,r=10))
+    return fig
+
+def agg_kategori_skpd(cube, sel):
+    ks = cube[("SKPD","KAT")].loc[sel,"total"].reset_index().sort_values("total",ascending=False)
+    ks.columns = ["Kategori","Jumlah"]
+    return ks
+
+def fig_kategori_skpd(cube, sel):
+    ks = agg_kategori_skpd(cube, sel); ks["Fmt"] = ks["Jumlah"].apply(lambda x: rp(x,True))
+    fig = px.bar(ks, x="Jumlah", y="Kategori", orientation="h",
+                 color="Kategori", color_discrete_map=BC, text="Fmt")
+    fig.update_traces(textposition="outside",
+        hovertemplate="<b>%{y}</b><br>Rp %{x:,.0f}<extra></extra>")
+    fig.update_layout(height=450, showlegend=False,
+                      margin=dict(t=10,b=10,l=10,r=80), xaxis_title="", yaxis_title="")
+    return fig
+
+def pg_eksplorasi(cube, sx):
     st.markdown("## 🔍 Eksplorasi Belanja per SKPD")
-    d = lamp2[(lamp2["LEVEL_NUM"]==6) & lamp2["KODE_REKENING"].str.startswith("5.",na=False)].copy()
-    sl = sorted(d["SKPD"].dropna().unique())
+    sk = cube[("SKPD",)]
+    sl = sorted(sk.index)
     sel = st.selectbox("🏢 Pilih SKPD:", sl, index=0)
-    sd = d[d["SKPD"]==sel]; tot = sd["JUMLAH_NUM"].sum()
-    st.info(f"**{sel}** — Total: **{rp(tot,True)}** ({len(sd):,} item)")
+    sd = cube["skpd_rows"](sel)
+    st.info(f"**{sel}** — Total: **{rp(sk.at[sel,'total'],True)}** ({sk.at[sel,'rows']:,} item)")
 
     L,R = st.columns(2)
     with L:
         st.markdown("### Proporsi Belanja")
-        sb = sd.copy(); sb["U"] = sb["URAIAN"].str[:40]
-        sa = sb.groupby(["KAT","U"])["JUMLAH_NUM"].sum().reset_index()
-        sa = sa[sa["JUMLAH_NUM"]>0].nlargest(30,"JUMLAH_NUM")
-        fig = px.sunburst(sa, path=["KAT","U"], values="JUMLAH_NUM",
-                          color="KAT", color_discrete_map=BC)
-        fig.update_traces(hovertemplate="<b>%{label}</b><br>Rp %{value:,.0f}<extra></extra>")
-        fig.update_layout(height=450, margin=dict(t=10,b=10,l=10,r=10))
-        st.plotly_chart(fig, use_container_width=True)
+        chart(cube, "eksplorasi/proporsi", (sel,), lambda: fig_proporsi(cube, sel))
 
     with R:
         st.markdown("### Breakdown Kategori")
-        ks = sd.groupby("KAT")["JUMLAH_NUM"].sum().reset_index().sort_values("JUMLAH_NUM",ascending=False)
-        ks.columns = ["Kategori","Jumlah"]; ks["Fmt"] = ks["Jumlah"].apply(lambda x: rp(x,True))
-        fig = px.bar(ks, x="Jumlah", y="Kategori", orientation="h",
-                     color="Kategori", color_discrete_map=BC, text="Fmt")
-        fig.update_traces(textposition="outside",
-            hovertemplate="<b>%{y}</b><br>Rp %{x:,.0f}<extra></extra>")
-        fig.update_layout(height=450, showlegend=False,
-                          margin=dict(t=10,b=10,l=10,r=80), xaxis_title="", yaxis_title="")
-        st.plotly_chart(fig, use_container_width=True)
+        chart(cube, "eksplorasi/kategori", (sel,), lambda: fig_kategori_skpd(cube, sel))
 
     st.markdown("### 📋 Rincian Belanja")
     q = st.text_input("🔎 Cari kode/uraian:", "")
-    dd = sd[["KODE_REKENING","URAIAN","JUMLAH_NUM","KAT","INDIKATOR"]].copy()
-    dd.columns = ["Kode","Uraian","Jumlah (Rp)","Kategori","Indikator"]
-    if q:
-        m = dd["Kode"].str.contains(q,case=False,na=False) | dd["Uraian"].str.contains(q,case=False,na=False) | dd["Indikator"].str.contains(q,case=False,na=False)
-        dd = dd[m]
-    st.dataframe(dd.sort_values("Jumlah (Rp)",ascending=False).style.format({"Jumlah (Rp)":"{:,.0f}"}),
-                 use_container_width=True, height=400)
-    st.download_button("📥 Download CSV", dd.to_csv(index=False).encode("utf-8"),
-                       f"belanja_{sel.replace(' ','_')}.csv","text/csv")
+    with phase("filter & cari", len(sd)) as p:
+        fp = np.arange(len(sd))
+        if q and cube["backend"] == "sqlite":
+            fp = np.sort(search(cube["skpd_search"](sel), q)[0])
+        elif q:
+            fp = np.sort(sd.index.get_indexer(search(sx("lamp2"), q, within=sd.index)[0]))
+        p["rows"] = len(fp)
+    ptable("eks", ("eksplorasi", cube["ver"], sel), sd, fp,
+           {"KODE_REKENING":"Kode","URAIAN":"Uraian","JUMLAH_NUM":"Jumlah (Rp)","KAT":"Kategori","INDIKATOR":"Indikator"},
+           money=["Jumlah (Rp)"], sort="Jumlah (Rp)")
+    export_ui("eks", ("eksplorasi", cube["ver"], sel, q),
+              lambda: sd.iloc[fp][["KODE_REKENING","URAIAN","JUMLAH_NUM","KAT","INDIKATOR"]].set_axis(
+                  ["Kode","Uraian","Jumlah (Rp)","Kategori","Indikator"], axis=1),
+              f"belanja_{sel.replace(' ','_')}")
 
 
 # ════════════════════════════════════════════
 # PAGE 3: DANA OTSUS
 # ════════════════════════════════════════════
 
-def pg_otsus(lamp7):
+def agg_otsus_sektor(cube):
+    sa = cube["otsus"].rename_axis("Sektor").reset_index()
+    sa = sa[sa["JUMLAH_NUM"]>0].sort_values("JUMLAH_NUM",ascending=True)
+    sa.columns = ["Sektor","Alokasi"]
+    return sa
+
+def fig_otsus_sektor(cube):
+    sa = agg_otsus_sektor(cube)
+    fig = px.bar(sa, x="Alokasi", y="Sektor", orientation="h",
+                 color_discrete_sequence=[CP["accent"]])
+    fig.update_traces(hovertemplate="<b>%{y}</b><br>Rp %{x:,.0f}<extra></extra>")
+    fig.update_layout(height=400, xaxis_title="", yaxis_title="", margin=dict(t=10,b=10,l=10,r=10))
+    return fig
+
+def fig_otsus_aliran(cube):
+    sd2 = agg_otsus_sektor(cube).iloc[::-1]
+    labels = ["Dana Otsus Aceh"] + sd2["Sektor"].tolist()
+    fig = go.Figure(go.Sankey(
+        node=dict(pad=15,thickness=20,line=dict(color="black",width=0.5),
+                  label=labels, color=[CP["primary"]]+[CP["accent"]]*len(sd2)),
+        link=dict(source=[0]*len(sd2), target=list(range(1,len(sd2)+1)),
+                  value=sd2["Alokasi"].tolist())))
+    fig.update_layout(height=400, margin=dict(t=10,b=10,l=10,r=10))
+    return fig
+
+def pg_otsus(cube):
     st.markdown("## 🏛️ Dana Otonomi Khusus Aceh (Lampiran VII)")
-    l7 = lamp7.copy()
-    l7p = l7[l7["KODE_REKENING"].str.match(r"^\d+\.\d+\.\d+$",na=False)].copy()
-    l7p["ku"] = l7p["KODE_REKENING"].str.extract(r"^(\d+\.\d+)")
-    UN = {"1.01":"Pendidikan","1.02":"Kesehatan","1.03":"Pekerjaan Umum",
-          "1.04":"Perumahan","1.06":"Sosial","2.09":"Pangan","2.11":"LH & Kehutanan",
-          "2.13":"Pemberdayaan Masyarakat","2.16":"Komunikasi","2.22":"Kebudayaan",
-          "3.25":"Kelautan","3.27":"Pertanian","9.01":"Keistimewaan Aceh"}
-    l7p["Sektor"] = l7p["ku"].map(UN).fillna("Lainnya")
-    st.metric("Total Dana Otsus", rp(l7["JUMLAH_NUM"].sum(),True))
+    st.metric("Total Dana Otsus", rp(cube["kpi"]["otsus"],True))
 
     L,R = st.columns(2)
     with L:
         st.markdown("### Distribusi per Sektor")
-        sa = l7p.groupby("Sektor")["JUMLAH_NUM"].sum().reset_index()
-        sa = sa[sa["JUMLAH_NUM"]>0].sort_values("JUMLAH_NUM",ascending=True)
-        sa.columns = ["Sektor","Alokasi"]
-        fig = px.bar(sa, x="Alokasi", y="Sektor", orientation="h",
-                     color_discrete_sequence=[CP["accent"]])
-        fig.update_traces(hovertemplate="<b>%{y}</b><br>Rp %{x:,.0f}<extra></extra>")
-        fig.update_layout(height=400, xaxis_title="", yaxis_title="", margin=dict(t=10,b=10,l=10,r=10))
-        st.plotly_chart(fig, use_container_width=True)
+        chart(cube, "otsus/sektor", (), lambda: fig_otsus_sektor(cube))
 
     with R:
         st.markdown("### Aliran Dana Otsus")
-        sd2 = l7p.groupby("Sektor")["JUMLAH_NUM"].sum().reset_index()
-        sd2 = sd2[sd2["JUMLAH_NUM"]>0].sort_values("JUMLAH_NUM",ascending=False)
-        labels = ["Dana Otsus Aceh"] + sd2["Sektor"].tolist()
-        fig = go.Figure(go.Sankey(
-            node=dict(pad=15,thickness=20,line=dict(color="black",width=0.5),
-                      label=labels, color=[CP["primary"]]+[CP["accent"]]*len(sd2)),
-            link=dict(source=[0]*len(sd2), target=list(range(1,len(sd2)+1)),
-                      value=sd2["JUMLAH_NUM"].tolist())))
-        fig.update_layout(height=400, margin=dict(t=10,b=10,l=10,r=10))
-        st.plotly_chart(fig, use_container_width=True)
+        chart(cube, "otsus/aliran", (), lambda: fig_otsus_aliran(cube))
 
     st.markdown("### 📋 Detail Otsus")
-    do = l7[["KODE_REKENING","URAIAN","JUMLAH_NUM"]].copy()
-    do.columns = ["Kode","Uraian","Jumlah (Rp)"]
-    do = do[do["Jumlah (Rp)"]>0]
-    st.dataframe(do.sort_values("Jumlah (Rp)",ascending=False).style.format({"Jumlah (Rp)":"{:,.0f}"}),
-                 use_container_width=True, height=400)
+    ptable("otsus", ("otsus", cube["ver"]), cube["otsus_rows"], cube["otsus_pos"],
+           {"KODE_REKENING":"Kode","URAIAN":"Uraian","JUMLAH_NUM":"Jumlah (Rp)"},
+           money=["Jumlah (Rp)"], sort="Jumlah (Rp)")
 
 
 # ════════════════════════════════════════════
 # PAGE 4: HIBAH & BANTUAN
 # ════════════════════════════════════════════
 
-def pg_hibah(lamp3, lamp5):
+def fig_hibah_jenis(cube):
+    hj = cube["hibah_jenis"].reset_index()
+    hj.columns = ["Jenis","Total"]
+    fig = px.pie(hj, values="Total", names="Jenis", hole=0.5,
+                 color_discrete_sequence=[CP["primary"],CP["warning"]])
+    fig.update_traces(textinfo="percent+label",
+        hovertemplate="<b>%{label}</b><br>Rp %{value:,.0f}<extra></extra>")
+    fig.update_layout(height=350, margin=dict(t=10,b=10,l=10,r=10))
+    return fig
+
+def agg_bantuan_kab(cube):
+    bk = cube["bantuan_kab"].reset_index()
+    bk.columns = ["Kab/Kota","Jenis","Besaran"]
+    return bk[bk["Besaran"]>0].sort_values("Besaran",ascending=True)
+
+def fig_bantuan_kab(cube):
+    bk = agg_bantuan_kab(cube)
+    fig = px.bar(bk, x="Besaran", y="Kab/Kota", orientation="h", color="Jenis",
+                 color_discrete_map={"UMUM":CP["secondary"],"KHUSUS":CP["warning"]}, barmode="stack")
+    fig.update_traces(hovertemplate="<b>%{y}</b><br>%{data.name}: Rp %{x:,.0f}<extra></extra>")
+    fig.update_layout(height=max(400,len(bk)*22), xaxis_title="", yaxis_title="",
+                      margin=dict(t=10,b=10,l=10,r=10))
+    return fig
+
+def pg_hibah(cube, sx, rx):
     st.markdown("## 🤝 Transparansi Hibah & Bantuan Keuangan")
     t1,t2 = st.tabs(["📄 Penerima Hibah (Lamp III)","🗺️ Bantuan Keuangan (Lamp V)"])
 
     with t1:
-        h = lamp3[lamp3["NO"].notna() & (lamp3["NO"]!="") & (lamp3["NO"]!="nan")].copy()
+        h, hj = cube["hibah"], cube["hibah_jenis"]
         c1,c2,c3 = st.columns(3)
-        c1.metric("Hibah Uang", rp(h[h["JENIS_HIBAH"]=="UANG"]["BESARAN_NUM"].sum(),True))
-        c2.metric("Hibah Barang", rp(h[h["JENIS_HIBAH"]=="BARANG"]["BESARAN_NUM"].sum(),True))
+        c1.metric("Hibah Uang", rp(hj.get("UANG",0),True))
+        c2.metric("Hibah Barang", rp(hj.get("BARANG",0),True))
         c3.metric("Jumlah Penerima", f"{len(h):,}")
 
         L,R = st.columns(2)
         with L:
             st.markdown("### Proporsi Hibah")
-            hj = h.groupby("JENIS_HIBAH")["BESARAN_NUM"].sum().reset_index()
-            hj.columns = ["Jenis","Total"]
-            fig = px.pie(hj, values="Total", names="Jenis", hole=0.5,
-                         color_discrete_sequence=[CP["primary"],CP["warning"]])
-            fig.update_traces(textinfo="percent+label",
-                hovertemplate="<b>%{label}</b><br>Rp %{value:,.0f}<extra></extra>")
-            fig.update_layout(height=350, margin=dict(t=10,b=10,l=10,r=10))
-            st.plotly_chart(fig, use_container_width=True)
+            chart(cube, "hibah/jenis", (), lambda: fig_hibah_jenis(cube))
         with R:
             st.markdown("### Top 15 Penerima")
-            th = h.nlargest(15,"BESARAN_NUM")[["NAMA_PENERIMA","BESARAN_NUM","JENIS_HIBAH"]]
-            th.columns = ["Penerima","Besaran (Rp)","Jenis"]
-            st.dataframe(th.style.format({"Besaran (Rp)":"{:,.0f}"}), use_container_width=True, height=350)
+            table(agg_top_penerima(rx), {"Besaran (Rp)":"{:,.0f}"}, height=350, hide_index=True)
 
         st.markdown("### 📋 Daftar Lengkap")
         jf = st.multiselect("Filter Jenis:", ["UANG","BARANG"], default=["UANG","BARANG"])
-        fh = h[h["JENIS_HIBAH"].isin(jf)]
-        dh = fh[["NO","NAMA_PENERIMA","ALAMAT","BESARAN_NUM","JENIS_HIBAH"]].copy()
-        dh.columns = ["No","Penerima","Alamat","Besaran (Rp)","Jenis"]
         sq = st.text_input("🔎 Cari penerima:", "", key="sh")
-        if sq:
-            dh = dh[dh["Penerima"].str.contains(sq,case=False,na=False)|dh["Alamat"].str.contains(sq,case=False,na=False)]
-        st.dataframe(dh.sort_values("Besaran (Rp)",ascending=False).style.format({"Besaran (Rp)":"{:,.0f}"}),
-                     use_container_width=True, height=400)
-        st.download_button("📥 Download CSV", dh.to_csv(index=False).encode("utf-8"), "hibah_apba_2025.csv")
+        with phase("filter & cari", len(h)) as p:
+            fp = np.flatnonzero(h["JENIS_HIBAH"].isin(jf).to_numpy())
+            if sq: fp = np.sort(search(sx("hibah"), sq, within=fp)[0])
+            p["rows"] = len(fp)
+        ptable("hibah", ("hibah", cube["ver"]), h, fp,
+               {"NO":"No","NAMA_PENERIMA":"Penerima","ALAMAT":"Alamat","BESARAN_NUM":"Besaran (Rp)","JENIS_HIBAH":"Jenis"},
+               money=["Besaran (Rp)"], sort="Besaran (Rp)")
+        export_ui("hibah", ("hibah", cube["ver"], tuple(jf), sq),
+                  lambda: h.iloc[fp][["NO","NAMA_PENERIMA","ALAMAT","BESARAN_NUM","JENIS_HIBAH"]].set_axis(
+                      ["No","Penerima","Alamat","Besaran (Rp)","Jenis"], axis=1),
+                  "hibah_apba_2025")
 
     with t2:
-        b = lamp5[lamp5["NO"].notna() & (lamp5["NO"]!="") & (lamp5["NO"]!="nan")].copy()
+        bj = cube["bantuan_jenis"]
         c1,c2 = st.columns(2)
-        c1.metric("Bantuan Umum", rp(b[b["JENIS"]=="UMUM"]["BESARAN_NUM"].sum(),True))
-        c2.metric("Bantuan Khusus", rp(b[b["JENIS"]=="KHUSUS"]["BESARAN_NUM"].sum(),True))
+        c1.metric("Bantuan Umum", rp(bj.get("UMUM",0),True))
+        c2.metric("Bantuan Khusus", rp(bj.get("KHUSUS",0),True))
         st.markdown("### Distribusi per Kabupaten/Kota")
-        bk = b.groupby(["NAMA_PENERIMA","JENIS"])["BESARAN_NUM"].sum().reset_index()
-        bk.columns = ["Kab/Kota","Jenis","Besaran"]
-        bk = bk[bk["Besaran"]>0].sort_values("Besaran",ascending=True)
-        fig = px.bar(bk, x="Besaran", y="Kab/Kota", orientation="h", color="Jenis",
-                     color_discrete_map={"UMUM":CP["secondary"],"KHUSUS":CP["warning"]}, barmode="stack")
-        fig.update_traces(hovertemplate="<b>%{y}</b><br>%{data.name}: Rp %{x:,.0f}<extra></extra>")
-        fig.update_layout(height=max(400,len(bk)*22), xaxis_title="", yaxis_title="",
-                          margin=dict(t=10,b=10,l=10,r=10))
-        st.plotly_chart(fig, use_container_width=True)
+        chart(cube, "hibah/bantuan_kab", (), lambda: fig_bantuan_kab(cube))
+
+    st.markdown("### 🔗 Semua Alokasi per Penerima")
+    q = st.text_input("Nama penerima (ejaan bebas, Lamp III & V):", "", key="rx")
+    if q:
+        with phase("cari penerima"):
+            e = recipient_lookup(rx, q)
+        if e is None:
+            st.warning(f"Penerima \"{q}\" tidak ditemukan.")
+        else:
+            r = recipient_rows(rx, e)
+            ej = r["NAMA_PENERIMA"].unique()
+            st.info(f"**{rx['nama'][e]}** — {len(r):,} alokasi, total **{rp(r['BESARAN_NUM'].sum(),True)}**"
+                    + (f" · ejaan: {', '.join(ej)}" if len(ej) > 1 else ""))
+            table(r[["LAMPIRAN","TAHUN","NAMA_PENERIMA","ALAMAT","JENIS","BESARAN_NUM"]].set_axis(
+                      ["Lampiran","Tahun","Nama Tercantum","Alamat","Jenis","Besaran (Rp)"], axis=1),
+                  {"Besaran (Rp)":"{:,.0f}"}, hide_index=True)
 
 
 # ════════════════════════════════════════════
 # PAGE 5: ANALISIS KOMPARATIF
 # ════════════════════════════════════════════
 
-def pg_analisis(lamp2):
-    st.markdown("## 📈 Analisis Komparatif")
-    d = lamp2[(lamp2["LEVEL_NUM"]==6) & lamp2["KODE_REKENING"].str.startswith("5.",na=False)].copy()
-
-    st.markdown("### Heatmap: Intensitas Belanja per SKPD & Jenis")
-    pv = d.groupby(["SKPD","KAT"])["JUMLAH_NUM"].sum().reset_index()
-    pt = pv.pivot_table(index="SKPD", columns="KAT", values="JUMLAH_NUM", fill_value=0)
+def fig_heatmap(cube):
+    pt = cube[("SKPD","KAT")]["total"].unstack("KAT", fill_value=0)
     pl = np.log10(pt.replace(0,np.nan))
     fig = px.imshow(pl, labels=dict(x="Jenis Belanja",y="SKPD",color="Log₁₀(Rp)"),
                     color_continuous_scale="Blues", aspect="auto")
     fig.update_layout(height=700, margin=dict(t=10,b=10,l=10,r=10))
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
-    st.markdown("### Korelasi: Sub-Kegiatan vs Anggaran")
-    pc = d.groupby("SKPD").agg(total=("JUMLAH_NUM","sum"),items=("JUMLAH_NUM","count"),
-                                indikator=("INDIKATOR","nunique")).reset_index()
+def fig_korelasi(cube):
+    pc = cube[("SKPD",)][["total","items","indikator"]].reset_index()
     fig = px.scatter(pc, x="indikator", y="total", size="items", color="total",
                      hover_name="SKPD", color_continuous_scale="Viridis",
                      labels={"indikator":"Sub-Kegiatan","total":"Total Anggaran (Rp)","items":"Item"})
     fig.update_traces(hovertemplate="<b>%{hovertext}</b><br>Sub-Keg: %{x}<br>Rp %{y:,.0f}<extra></extra>")
     fig.update_layout(height=500, margin=dict(t=10,b=10,l=10,r=10))
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+def top10_skpd(cube):
+    return cube[("SKPD",)]["total"].nlargest(10).index.tolist()
+
+def fig_radar(cube, sel):
+    skk = cube[("SKPD","KAT")]["total"]
+    rp2 = skk[skk.index.get_level_values("SKPD").isin(top10_skpd(cube))].reset_index()
+    rp2["Pct"] = (rp2["total"]/rp2.groupby("SKPD",observed=True)["total"].transform("sum")*100).round(1)
+    fig = go.Figure()
+    for s in sel:
+        sr = rp2[rp2["SKPD"]==s]
+        if len(sr) > 0:
+            fig.add_trace(go.Scatterpolar(
+                r=sr["Pct"].tolist()+[sr["Pct"].iloc[0]],
+                theta=sr["KAT"].tolist()+[sr["KAT"].iloc[0]],
+                fill="toself", name=s[:25],
+                hovertemplate="<b>%{theta}</b><br>%{r:.1f}%<extra></extra>"))
+    fig.update_layout(polar=dict(radialaxis=dict(visible=True,range=[0,100])),
+                      height=500, margin=dict(t=30,b=30,l=80,r=80),
+                      showlegend=True, legend=dict(font=dict(size=9)))
+    return fig
+
+def pg_analisis(cube):
+    st.markdown("## 📈 Analisis Komparatif")
+
+    st.markdown("### Heatmap: Intensitas Belanja per SKPD & Jenis")
+    chart(cube, "analisis/heatmap", (), lambda: fig_heatmap(cube))
+
+    st.markdown("### Korelasi: Sub-Kegiatan vs Anggaran")
+    chart(cube, "analisis/korelasi", (), lambda: fig_korelasi(cube))
 
     st.markdown("### Radar: Profil Belanja Top 10 SKPD")
-    t10 = d.groupby("SKPD")["JUMLAH_NUM"].sum().nlargest(10).index.tolist()
-    rd = d[d["SKPD"].isin(t10)]
-    rp2 = rd.groupby(["SKPD","KAT"])["JUMLAH_NUM"].sum().reset_index()
-    rp2["Pct"] = rp2.groupby("SKPD")["JUMLAH_NUM"].transform(lambda x: x/x.sum()*100).round(1)
+    t10 = top10_skpd(cube)
     sel = st.multiselect("Pilih SKPD:", t10, default=t10[:3])
     if sel:
-        fig = go.Figure()
-        for s in sel:
-            sr = rp2[rp2["SKPD"]==s]
-            if len(sr) > 0:
-                fig.add_trace(go.Scatterpolar(
-                    r=sr["Pct"].tolist()+[sr["Pct"].iloc[0]],
-                    theta=sr["KAT"].tolist()+[sr["KAT"].iloc[0]],
-                    fill="toself", name=s[:25],
-                    hovertemplate="<b>%{theta}</b><br>%{r:.1f}%<extra></extra>"))
-        fig.update_layout(polar=dict(radialaxis=dict(visible=True,range=[0,100])),
-                          height=500, margin=dict(t=30,b=30,l=80,r=80),
-                          showlegend=True, legend=dict(font=dict(size=9)))
-        st.plotly_chart(fig, use_container_width=True)
+        chart(cube, "analisis/radar", tuple(sel), lambda: fig_radar(cube, sel))
 
 
 # ════════════════════════════════════════════
 # PAGE 6: PENCARIAN GLOBAL
 # ════════════════════════════════════════════
 
-def pg_search(lamp2):
+def pg_search(sx):
     st.markdown("## 🔎 Pencarian Global")
     q = st.text_input("Masukkan kata kunci:", "")
     if q and len(q)>=2:
-        m = lamp2["KODE_REKENING"].str.contains(q,case=False,na=False) | \
-            lamp2["URAIAN"].str.contains(q,case=False,na=False) | \
-            lamp2["INDIKATOR"].str.contains(q,case=False,na=False)
-        r = lamp2[m].copy()
-        st.success(f"Ditemukan **{len(r):,}** baris untuk \"{q}\"")
-        dd = r[["KODE_REKENING","URAIAN","JUMLAH_NUM","KAT","SKPD","HALAMAN"]].copy()
-        dd.columns = ["Kode","Uraian","Jumlah (Rp)","Kategori","SKPD","Halaman"]
-        st.dataframe(dd.sort_values("Jumlah (Rp)",ascending=False).style.format({"Jumlah (Rp)":"{:,.0f}"}),
-                     use_container_width=True, height=500)
-        st.download_button("📥 Download", dd.to_csv(index=False).encode("utf-8"), "pencarian_apba.csv")
+        ix = sx("lamp2")
+        with phase("cari", ix["n"]) as p:
+            pos, n = search(ix, q)
+            p["rows"] = n
+        st.success(f"Ditemukan **{n:,}** baris untuk \"{q}\" (urut relevansi)")
+        ptable("cari", ("lamp2", ix["ver"]), ix["df"], pos,
+               {"KODE_REKENING":"Kode","URAIAN":"Uraian","JUMLAH_NUM":"Jumlah (Rp)","KAT":"Kategori","SKPD":"SKPD","HAL_NUM":"Halaman"},
+               money=["Jumlah (Rp)"], natural="Relevansi", height=500)
+        export_ui("cari", ("cari", ix["ver"], q),
+                  lambda: ix["df"].iloc[pos][["KODE_REKENING","URAIAN","JUMLAH_NUM","KAT","SKPD","HAL_NUM"]].set_axis(
+                      ["Kode","Uraian","Jumlah (Rp)","Kategori","SKPD","Halaman"], axis=1),
+                  "pencarian_apba")
     elif q: st.warning("Minimal 2 karakter.")
 
 
+# ════════════════════════════════════════════
+# PAGE 7: STRUKTUR REKENING
+# ════════════════════════════════════════════
+
+REK_COLS = {"KODE_REKENING":"Kode","URAIAN":"Uraian","JUMLAH_NUM":"Jumlah (Rp)",
+            "ANAK_NUM":"Jumlah Anak (Rp)","SELISIH_NUM":"Selisih (Rp)","PISAH_NUM":"Anak Terpisah (Rp)",
+            "HAL_NUM":"Halaman"}
+REK_MONEY = ["Jumlah (Rp)","Jumlah Anak (Rp)","Selisih (Rp)","Anak Terpisah (Rp)"]
+
+def fig_rekening(t, kids):
+    df = t["df"].iloc[kids].nlargest(20, "JUMLAH_NUM").iloc[::-1]
+    rk = pd.DataFrame({"Rekening": (df["KODE_REKENING"] + " " + df["URAIAN"].astype(str).str[:40]).to_numpy(),
+                       "Jumlah": df["JUMLAH_NUM"].to_numpy()})
+    fig = px.bar(rk, x="Jumlah", y="Rekening", orientation="h", color_discrete_sequence=[CP["secondary"]])
+    fig.update_traces(hovertemplate="<b>%{y}</b><br>Rp %{x:,.0f}<extra></extra>")
+    fig.update_layout(height=max(300, len(rk)*24), xaxis_title="", yaxis_title="",
+                      margin=dict(t=10,b=10,l=10,r=10), xaxis=dict(tickformat=",.0f"))
+    return fig
+
+def pg_rekening(t):
+    st.markdown("## 🌳 Struktur Kode Rekening (Lampiran II)")
+    df = t["df"]
+    if not t["akun"]:
+        st.warning("Lampiran II tidak memuat baris kelompok (level 2)."); return
+    lab = lambda i: "— semua —" if i is None else \
+        f"{df['KODE_REKENING'].iat[i]} · {str(df['URAIAN'].iat[i])[:60]} (hal. {df['HAL_NUM'].iat[i]})"
+    ak = st.selectbox(f"{LEVEL_NAMA[0]}:", sorted(t["akun"]), format_func=lambda a: f"{a} · {AKUN.get(a,'Lainnya')}")
+    node, kids = None, t["akun"][ak]
+    for lv in LEVEL_NAMA[1:]:
+        if not len(kids): break
+        pick = st.selectbox(f"{lv}:", [None, *kids.tolist()], format_func=lab, key=f"rek_{ak}_{node}")
+        if pick is None: break
+        node, kids = pick, tree_kids(t, pick)
+
+    if node is None:
+        tertera, rinci = df["JUMLAH_NUM"].iloc[kids].sum(), tree_total(t, kids).sum()
+        anak, pisah = df["JUMLAH_NUM"].iloc[kids].sum(), np.nan
+        judul = f"{ak} {AKUN.get(ak,'Lainnya')}"
+    else:
+        tertera, rinci = df["JUMLAH_NUM"].iat[node], tree_total(t, node)
+        anak, pisah = df["ANAK_NUM"].iat[node], df["PISAH_NUM"].iat[node]
+        judul = lab(node)
+    st.info(f"**{judul}**")
+    c1,c2,c3,c4 = st.columns(4)
+    c1.metric("Jumlah tertera", rp(tertera,True))
+    c2.metric("Σ anak langsung", rp(anak,True) if pd.notna(anak) else "—",
+              delta=rp(anak-tertera,True) if pd.notna(anak) and abs(anak-tertera) > TOL_RP else None, delta_color="off")
+    c3.metric("Σ anak terpisah", rp(pisah,True) if pd.notna(pisah) else "—")
+    c4.metric("Σ rincian (daun)", rp(rinci,True))
+
+    if len(kids):
+        st.markdown(f"### Rincian ({len(kids):,} baris)")
+        chart(t, "rekening/anak", (ak, node), lambda: fig_rekening(t, kids))
+        ptable("rek", ("rekening", t["ver"]), df, kids, REK_COLS, money=REK_MONEY, natural="Urutan dokumen")
+    else:
+        st.caption("Baris rincian terendah (tanpa turunan).")
+
+    bad, lepas = t["bad"], t["lepas"]
+    with st.expander(f"✅ Validasi rollup: {len(bad):,} induk ≠ jumlah anaknya · {len(lepas):,} baris tak terjangkau"):
+        st.caption(f"Selisih = jumlah anak langsung − jumlah tertera, toleransi Rp {TOL_RP:,.0f}. "
+                   f"{t['orphan']:,} baris tercantum tanpa baris induk langsung dan digantung sebagai anak "
+                   f"terpisah di bawah kemunculan terdekat kode induknya (SKPD yang sama, lalu se-lampiran); "
+                   f"anak terpisah tidak ikut validasi selisih.")
+        if len(bad):
+            ptable("rekval", ("rekening", t["ver"]), df, bad, REK_COLS, money=REK_MONEY, natural="Urutan dokumen")
+        if len(lepas):
+            st.markdown(f"**{len(lepas):,} baris tidak terjangkau dari akun mana pun**")
+            ptable("reklepas", ("rekening", t["ver"]), df, lepas, REK_COLS, money=REK_MONEY, natural="Urutan dokumen")
+
+
 # ════════════════════════════════════════════
 # MAIN
 # ════════════════════════════════════════════
 
+PAGES = ["📊 Ringkasan Eksekutif", "🔍 Eksplorasi Belanja", "🏛️ Dana Otsus", "🤝 Hibah & Bantuan",
+         "📈 Analisis Komparatif", "🔎 Pencarian Global", "🌳 Struktur Rekening"]
+
 def main():
+    st.set_page_config(**PAGE_CONFIG)
     with st.sidebar:
         st.markdown("# 🏛️ APBA Aceh 2025")
         st.caption("Dashboard Transparansi Anggaran")
         st.divider()
-        page = st.radio("📑 Navigasi:", [
-            "📊 Ringkasan Eksekutif",
-            "🔍 Eksplorasi Belanja",
-            "🏛️ Dana Otsus",
-            "🤝 Hibah & Bantuan",
-            "📈 Analisis Komparatif",
-            "🔎 Pencarian Global",
-        ])
+        page = st.radio("📑 Navigasi:", [p for p in PAGES if BACKEND != "sqlite" or "Hibah" not in p])
+        if BACKEND == "sqlite":
+            th = apba_sqlite.years()
+            tahun = st.selectbox("📅 Tahun Anggaran:", th, index=len(th)-1)
+            st.caption("Backend SQLite: Hibah & Bantuan (Lamp III/V) tidak tersedia.")
+        for w in PAGE_IDX[3]: st.warning(f"Mapping SKPD: {w}", icon="⚠️")
+        dbg = st.query_params.get("debug")
+        if dbg:
+            with st.expander("⏱️ Performa", expanded=True):
+                perf_box = st.empty()
+            if BACKEND != "sqlite":
+                with st.expander("🧠 Memori data"):
+                    st.dataframe(memory_report().style.format(precision=1), hide_index=True)
         st.divider()
         st.markdown("**Sumber:** Qanun APBA 2025\n\n**Cakupan:** Lampiran I-VII\n\n**Update:** Februari 2026")
         st.caption("© 2026 Transparansi APBA Aceh")
 
-    lamp2, lamp3, lamp5, lamp7, skpd_df, urusan_inv = load_data()
+    perf_begin(page.split(" ", 1)[1])
+    try:
+        with phase("load_data") as p:
+            ld = perf_history()["loads"]["load_data"]; b = ld["builds"]
+            v = load_version(tahun if BACKEND == "sqlite" else None)   # dipakai sepanjang rerun ini
+            ld["calls"] += 1; ld["miss"] += ld["builds"] != b
+            p["rows"], p["cache"] = len(v["data"][0]) if "data" in v else None, "miss" if ld["builds"] != b else "hit"
+        if BACKEND != "sqlite" and (err := data_versions()["error"]):
+            st.sidebar.warning(f"Reload data gagal ({err}); versi {v['ver']} tetap dipakai.", icon="⚠️")
+        with phase("load_cube"):
+            cube = load_cube(v=v)
+        sx = lambda name: load_search(name, v)   # dibangun saat halaman pertama kali mencari
 
-    if "Ringkasan" in page:     pg_ringkasan(lamp2,lamp3,lamp5,lamp7,urusan_inv)
-    elif "Eksplorasi" in page:  pg_eksplorasi(lamp2)
-    elif "Otsus" in page:       pg_otsus(lamp7)
-    elif "Hibah" in page:       pg_hibah(lamp3,lamp5)
-    elif "Komparatif" in page:  pg_analisis(lamp2)
-    elif "Pencarian" in page:   pg_search(lamp2)
+        with phase(page.split(" ", 1)[1]):
+            if "Ringkasan" in page:     pg_ringkasan(cube)
+            elif "Eksplorasi" in page:  pg_eksplorasi(cube,sx)
+            elif "Otsus" in page:       pg_otsus(cube)
+            elif "Hibah" in page:       pg_hibah(cube,sx,load_recipients(v))
+            elif "Komparatif" in page:  pg_analisis(cube)
+            elif "Pencarian" in page:   pg_search(sx)
+            elif "Rekening" in page:    pg_rekening(load_tree(v))
+    finally:
+        rec = perf_end()
+    if dbg: perf_panel(perf_box, rec)
 
 if __name__ == "__main__":
     main()
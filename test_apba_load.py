@@ -0,0 +1,74 @@
+"""Pemuatan CSV (paralel = serial, kolom bertipe) dan pruning snapshot."""
+
+import os
+import time
+
+import pandas as pd
+import pytest
+
+import dashboard_apba_2025 as d
+
+CSV = {
+    "lamp2": """NO,KODE_REKENING,URAIAN,JUMLAH_RP,LEVEL,HALAMAN,INDIKATOR
+1,5,BELANJA,1500000.50,1,55,
+2,5.1,BELANJA OPERASI,1500000.50,2,55,
+3,5.1.02,Belanja Barang dan Jasa,1500000.50,3,56,
+4,5.1.02.01.01.0024,"Belanja Alat/Bahan, Kantor",1000000,6,56,Jumlah dokumen
+5,5.1.02.01.01.0026,Belanja Bahan Cetak,500000.50,6,83,Jumlah dokumen
+6,4.1.01,Pajak Daerah,,3,210,
+7,1.01.01,Program Penunjang,250000,5,,Persentase capaian
+""",
+    "lamp3": """NO,NAMA_PENERIMA,ALAMAT,BESARAN_RP,JENIS_HIBAH,HALAMAN
+1,Yayasan Al-Ikhlas,"Gampong Lampineung, Kota Banda Aceh",50000000,UANG,1100
+,Jumlah,,50000000,,1100
+2,Dayah Darul Ulum,Kab. Pidie,25000000.75,BARANG,1101
+""",
+    "lamp5": """NO,NAMA_PENERIMA,JENIS,BESARAN_RP,HALAMAN
+1,Kota Sabang,UMUM,1000000000,1200
+2,Kab. Pidie,KHUSUS,,1201
+""",
+    "lamp7": """KODE_REKENING,URAIAN,JUMLAH_RP,HALAMAN
+1.01.01,Program Pendidikan,300000000,1300
+1.02,Kesehatan,0,1300
+""",
+}
+
+
+@pytest.fixture
+def data(tmp_path, monkeypatch):
+    for n, text in CSV.items():
+        (tmp_path / d.SRC[n]).write_text(text, encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.mark.parametrize("workers", [None, len(d.SRC)])
+def test_build_data_workers_identik(data, workers):
+    (fa, ta), (fb, tb) = d._build_data(workers=1), d._build_data(workers=workers)
+    for a, b in zip(fa[:-1], fb[:-1]):
+        pd.testing.assert_frame_equal(a, b, check_exact=True)
+    assert fa[-1] == fb[-1]
+    assert list(ta) == list(tb)
+    for k in ta:
+        pd.testing.assert_series_equal(ta[k], tb[k], check_exact=True)
+
+
+def test_build_data_bertipe(data):
+    (lamp2, lamp3, lamp5, lamp7, _, _), text = d._build_data(workers=1)
+    assert len(lamp2) == 7 and str(lamp2["HAL_NUM"].dtype) == "Int16"
+    assert lamp2["JUMLAH_NUM"].isna().sum() == 1
+    assert lamp2["SKPD"].iat[4] == "Bappeda" and lamp2["KAT"].dtype == "category"
+    assert list(text[("lamp2", "INDIKATOR")].iloc[[0, 3]].astype(object).fillna("")) == ["", "Jumlah dokumen"]
+    assert len(lamp3) == 3 and lamp5["BESARAN_NUM"].isna().sum() == 1 and len(lamp7) == 2
+
+
+def test_snap_prune_hanya_versi_lama_selesai(tmp_path, monkeypatch):
+    monkeypatch.setattr(d, "CACHE_DIR", str(tmp_path))
+    lama = time.time() - d.SNAP_GRACE_S - 60
+    for o in ["baru", "lama", "aktif-replika", "lama.tmp123", "setengah"]:
+        (tmp_path / o).mkdir()
+        if ".tmp" not in o and o != "setengah":
+            (tmp_path / o / "meta.json").write_text("{}")
+    for o in ["lama", "lama.tmp123", "setengah"]:
+        os.utime(tmp_path / o / "meta.json" if o == "lama" else tmp_path / o, (lama, lama))
+    d._snap_prune("baru")
+    assert sorted(os.listdir(tmp_path)) == ["aktif-replika", "baru", "lama.tmp123", "setengah"]
@@ -0,0 +1,70 @@
+"""Normalisasi nama & penggabungan entitas penerima (build_recipients)."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dashboard_apba_2025 as d
+
+
+def cube(hibah, bantuan=()):
+    h = pd.DataFrame({"NAMA_PENERIMA": hibah, "ALAMAT": "Aceh", "JENIS_HIBAH": "UANG",
+                      "BESARAN_NUM": 1e6 * (1 + pd.RangeIndex(len(hibah)))})
+    b = pd.DataFrame({"NAMA_PENERIMA": list(bantuan), "JENIS": "UMUM", "BESARAN_NUM": 1e9})
+    return {"hibah": h, "bantuan": b}
+
+
+@pytest.mark.parametrize("lama, baru", [
+    ("Tjut Njak Dhien", "CUT NYAK DHIEN"),
+    ("Koperasi Soeka Madjoe", "KOPERASI SUKA MAJU"),
+    ("Yys. Al-Ikhlas Djeumpa", "YAYASAN ALIKHLAS JEUMPA"),
+])
+def test_norm_nama_ejaan_lama(lama, baru):
+    assert d.norm_nama(lama) == baru
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Gampong Lam Ara", "Gampong Lamara"),
+    ("Tjut Njak Dhien", "Cut Nyak Dhien"),
+    ("Sanggar Tjoet Njak Dhien", "Sanggar Cut Nyak Dhien"),
+    ("Yayasan Meunasah Lam Ara", "Yayasan Meunasah Lamara"),
+])
+def test_varian_satu_entitas(a, b):
+    ka, _ = d._rx_keys(d.norm_nama(a))
+    kb, _ = d._rx_keys(d.norm_nama(b))
+    assert ka & kb, "harus berbagi kunci blok"
+    rx = d.build_recipients(cube([a, "Yayasan Nurul Huda", b]))
+    eid = rx["rows"]["EID"].to_numpy()
+    assert eid[0] == eid[2] != eid[1]
+    assert rx["varian"][eid[0]] == 2
+    assert d.recipient_lookup(rx, b) == eid[0]
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Yayasan Nurul Huda", "Yayasan Nurul Iman"),
+    ("Gampong Lam Ara", "Gampong Lam Ara Baro"),
+    ("Masjid Al-Falah 1", "Masjid Al-Falah 2"),
+    ("Yayasan Lamara", "Gampong Lamara"),
+])
+def test_nama_berbeda_tidak_digabung(a, b):
+    rx = d.build_recipients(cube([a, b]))
+    eid = rx["rows"]["EID"].to_numpy()
+    assert eid[0] != eid[1]
+
+
+def test_hibah_dan_bantuan_satu_indeks():
+    rx = d.build_recipients(cube(["Kota Sabang"], ["KOTA SABANG", "Kab. Pidie"]))
+    eid = rx["rows"]["EID"].to_numpy()
+    assert list(rx["rows"]["LAMPIRAN"]) == ["III", "V", "V"]
+    assert eid[0] == eid[1] != eid[2]
+
+
+@pytest.mark.parametrize("kosong", ["", "-", "...", " ", np.nan, None])
+def test_nama_kosong(kosong):
+    assert d.norm_nama(kosong) == "" and d.fonetik("") == ""
+    assert d._rx_keys(d.norm_nama(kosong)) == (set(), {})
+    rx = d.build_recipients(cube([kosong, "Yayasan Nurul Huda", "-"]))
+    eid = rx["rows"]["EID"].to_numpy()
+    assert eid[0] != eid[1]
+    assert d.recipient_lookup(rx, kosong) is None and d.recipient_lookup(rx, "...") is None
+    assert d.recipient_lookup(rx, "Yys Nurul Huda") == eid[1]
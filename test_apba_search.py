@@ -0,0 +1,49 @@
+"""Indeks trigram (build_search/search) harus sama dengan pemindaian str.contains."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dashboard_apba_2025 as d
+
+FIELDS = ["KODE_REKENING", "URAIAN", "INDIKATOR"]
+KATA = ["Belanja", "alat", "Bahan", "kantor", "cetak", "Jasa", "pegawai", "dokumen", "Jumlah",
+        "Persentase", "capaian", "ATK", "al-ikhlas", "Lamara", "5.1"]
+
+
+@pytest.fixture(scope="module")
+def df():
+    rng = np.random.default_rng(7)
+    n = 3000
+    kode = ["5", "5.1", "5.1.02", "4.1.01", "1.01.01", "5.1.02.01.01.0024", "5.1.02.01.01.0026", "5.2.10.3"]
+    teks = lambda k: [" ".join(rng.choice(KATA, rng.integers(1, k))) for _ in range(n)]
+    ind = pd.Series(teks(3), dtype=object)
+    ind[rng.random(n) < 0.4] = np.nan
+    return pd.DataFrame({"KODE_REKENING": rng.choice(kode, n), "URAIAN": teks(5), "INDIKATOR": ind,
+                         "JUMLAH_NUM": rng.integers(0, 10**9, n).astype(float)})
+
+
+def scan(df, q):
+    m = np.ones(len(df), bool)
+    for t in q.lower().split():
+        m &= np.any([df[f].fillna("").str.lower().str.contains(t, regex=False) for f in FIELDS], axis=0)
+    return np.flatnonzero(m)
+
+
+@pytest.mark.parametrize("q", [
+    "5.1.02", "5.1.02.01.01.0024", "5", "5.", "4.1",                 # kode
+    "al", "5 a", "b", "-",                                           # < 3 huruf
+    "belanja", "BELANJA ALAT", "jumlah dokumen", "alat 5.1.02 kantor",
+    "al-ikhlas", "capaian persentase atk", "zzz", "belanja zzz",     # banyak kata / tanpa hasil
+])
+def test_search_sama_dengan_scan(df, q):
+    ix = d.build_search(df, FIELDS, kode="KODE_REKENING", amount="JUMLAH_NUM")
+    pos, n = d.search(ix, q)
+    exp = scan(df, q)
+    assert n == len(exp) == len(pos)
+    np.testing.assert_array_equal(np.sort(pos), exp)
+    within = np.arange(0, len(df), 3)
+    pos, n = d.search(ix, q, within=within)
+    np.testing.assert_array_equal(np.sort(pos), np.intersect1d(exp, within))
+    head, _ = d.search(ix, q, limit=10, offset=5)
+    np.testing.assert_array_equal(head, d.search(ix, q)[0][5:15])
@@ -0,0 +1,78 @@
+"""Ingest SQLite: ingest ulang (master maupun lampiran) harus idempoten."""
+
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+import pytest
+
+import apba_sqlite as s
+import dashboard_apba_2025 as d
+from test_apba_load import CSV
+
+MASTER = """row_id,kode_skpd,nama_skpd,nama_urusan,kode_rekening,kode_akun,level,kategori_belanja,uraian,jumlah_rp,lampiran,tahun_anggaran
+1,1.01,Dinas Pendidikan,Pendidikan,5.1.02.01.01.0024,5,6,Belanja Barang & Jasa,Belanja ATK,2000000,II,2025
+2,1.01,Dinas Pendidikan,Pendidikan,4.1.01.01.01.0001,4,6,,Pajak Daerah,9000000,II,2025
+3,1.02,Dinas Kesehatan,Kesehatan,5.1.01.01.01.0001,5,6,Belanja Pegawai,Gaji,3000000,II,2024
+4,1.01,Dinas Pendidikan,Pendidikan,5.1.02.01.01.0026,5,6,Belanja Barang & Jasa,Belanja Cetak,500000,II,2025
+"""
+
+
+@pytest.fixture
+def db(tmp_path):
+    for n, text in CSV.items():
+        (tmp_path / d.SRC[n]).write_text(text, encoding="utf-8")
+    (tmp_path / "master.csv").write_text(MASTER, encoding="utf-8")
+    return tmp_path
+
+
+def isi(db):
+    with closing(sqlite3.connect(db / "a.sqlite")) as con:
+        return {t: pd.read_sql(f"SELECT * FROM {t} ORDER BY rowid", con)
+                for t in ["rincian", *s.AGREGAT] if t in s._tables(con, t)}
+
+
+def sama(a, b):
+    assert list(a) == list(b)
+    for t in a:
+        pd.testing.assert_frame_equal(a[t], b[t])
+
+
+def lampiran(db):
+    s.ingest_lampiran(str(db), str(db / "a.sqlite"), chunksize=3)
+
+
+def master(db):
+    s.ingest(str(db / "master.csv"), str(db / "a.sqlite"), chunksize=2)
+
+
+def test_ingest_ulang_idempoten(db):
+    lampiran(db); a = isi(db)
+    lampiran(db); sama(a, isi(db))
+    master(db); b = isi(db)
+    master(db); sama(b, isi(db))
+
+
+def test_master_mengganti_lampiran(db):
+    lampiran(db); master(db)
+    t = isi(db)
+    assert t["agregat_otsus"].empty
+    assert set(t["rincian"]["tahun_anggaran"]) == {2024, 2025}
+    assert (t["rincian"]["lampiran"] == "II").all()
+    assert s.kpi(2025, str(db / "a.sqlite")) == {"pend": 9e6, "bel": 2.5e6}
+    assert s.otsus(2025, str(db / "a.sqlite")).empty
+
+
+def test_lampiran_kembali_setelah_master(db):
+    lampiran(db); a = isi(db)
+    master(db); lampiran(db)
+    b = isi(db)
+    sama({t: f[f["tahun_anggaran"] == 2025].reset_index(drop=True) for t, f in a.items()},
+         {t: f[f["tahun_anggaran"] == 2025].reset_index(drop=True) for t, f in b.items()})
+    assert set(b["rincian"]["tahun_anggaran"]) == {2024, 2025}
+
+
+def test_skpd_rows_urutan_dokumen(db):
+    master(db)
+    r = s.skpd_rows(2025, "Dinas Pendidikan", str(db / "a.sqlite"))
+    assert list(r.index) == [1, 4] and list(r["URAIAN"]) == ["Belanja ATK", "Belanja Cetak"]
@@ -0,0 +1,46 @@
+"""current_version(): cold start saat CSV sumber sedang ditulis."""
+
+import itertools
+
+import pytest
+
+import dashboard_apba_2025 as d
+
+
+@pytest.fixture
+def versi(monkeypatch):
+    d.data_versions.clear()
+    monkeypatch.setattr(d, "STABLE_WAIT_S", 0)
+    monkeypatch.setattr(d, "_file_hash", lambda f: f"h:{f}")
+    built = []
+    monkeypatch.setattr(d, "_build_version", lambda hashes, prev=None: built.append(hashes) or {"hash": hashes})
+    yield built
+    d.data_versions.clear()
+
+
+def fake_stat(monkeypatch, seq):
+    it = iter(seq)
+    monkeypatch.setattr(d, "_stat", lambda: {n: next(it) for n in d.SRC})
+
+
+def test_cold_start_menunggu_stat_stabil(versi, monkeypatch):
+    # stat berubah di antara hash & pengecekan, lalu stabil → tetap membangun versi
+    fake_stat(monkeypatch, [1] * 4 + [2] * 4 + [2] * 4 + [2] * 4)
+    v = d.current_version()
+    assert v is not None and v["hash"] == {n: f"h:{f}" for n, f in d.SRC.items()}
+    assert len(versi) == 1 and d.data_versions()["stat"] == {n: 2 for n in d.SRC}
+
+
+def test_cold_start_tidak_pernah_none(versi, monkeypatch):
+    fake_stat(monkeypatch, itertools.count())       # terus berubah
+    with pytest.raises(RuntimeError, match="terus berubah"):
+        d.current_version()
+    assert not versi and d.data_versions()["cur"] is None
+
+
+def test_reload_saat_ditulis_memakai_versi_lama(versi, monkeypatch):
+    fake_stat(monkeypatch, [1] * 8)
+    v1 = d.current_version()
+    fake_stat(monkeypatch, [2] * 4 + [3] * 4)
+    d.data_versions()["t"] = 0.0
+    assert d.current_version() is v1 and len(versi) == 1